@@ -3,10 +3,13 @@
 
 import streamlit as st
 from datetime import datetime
+from config import DASHBOARD_PROFILE
+from src.ui import profiling
 from src.ui.charts import line_chart, column_chart
-from src.ui.queries import time_vs_temp, temp_vs_speed, time_vs_power, temp_vs_power, temp_ranges, years_available, months_available, days_available, temp_summary
+from src.ui.queries import dashboard_data, years_available, months_available, days_available, TEMP_RANGE_EDGES
 
 st.set_page_config(page_title="Meu Processador", layout="wide")
+profiling.start_run()
 
 st.markdown("<h1 style='text-align: center; color: black;'>Meu Processador</h1>", unsafe_allow_html=True)
 
@@ -53,21 +56,42 @@ with st.sidebar:
     )
     day_val = None if sel_day == "Todos" else int(sel_day)
 
+    st.header("Faixas de Temperatura")
 
-# Carregando dataframes
-df_temp_ranges = temp_ranges(year=year_val, month=month_val, day=day_val)
-df_temp_vs_speed = temp_vs_speed(year=year_val, month=month_val, day=day_val)
-df_time_vs_temp = time_vs_temp(year=year_val, month=month_val, day=day_val)
-df_time_vs_power = time_vs_power(year=year_val, month=month_val, day=day_val)
-df_temp_vs_power = temp_vs_power(year=year_val, month=month_val, day=day_val)
-df_temp_summary = temp_summary(year=year_val, month=month_val, day=day_val)
+    # Limites das faixas do gráfico de minutos por faixa, em ºC (ex.: "60, 70, 80, 90")
+    edges_text = st.text_input(
+        "Limites das faixas (ºC)",
+        value=", ".join(str(edge) for edge in TEMP_RANGE_EDGES),
+        help="Valores inteiros separados por vírgula; cada limite inicia uma nova faixa."
+    )
+    try:
+        range_edges = tuple(sorted({int(edge) for edge in edges_text.split(",") if edge.strip()}))
+    except ValueError:
+        range_edges = ()
+    if not range_edges:
+        st.warning("Limites inválidos; usando as faixas padrão.")
+        range_edges = TEMP_RANGE_EDGES
+
+
+# Séries de cada visão, em grupos lidos em uma única chamada, na ordem em que aparecem na página.
+# Só a visão selecionada é consultada antes de desenhar; as demais são carregadas no final (pré-busca)
+VIEW_DATASETS = {
+    "Resumo": [("temp_summary",), ("temp_ranges",)],
+    "Séries por Hora": [("time_vs_temp", "time_vs_power")],
+    "Relações": [("temp_vs_speed", "temp_vs_power")],
+}
+
+
+def load(names):
+    return dashboard_data(year=year_val, month=month_val, day=day_val, edges=range_edges, names=names)
 
 
-# Layout principal
-summary_tab, series_tab, relations_tab = st.tabs(["Resumo", "Séries por Hora", "Relações"])
+# Layout principal: seletor de visão (com st.tabs, o conteúdo de todas as abas é executado a cada filtro)
+view = st.radio("Visão", list(VIEW_DATASETS), horizontal=True, label_visibility="collapsed")
 
-# Aba "Resumo": visão geral e distribuição de faixas de temperatura
-with summary_tab:
+# Visão "Resumo": visão geral e distribuição de faixas de temperatura
+if view == "Resumo":
+    df_temp_summary = load(("temp_summary",))["temp_summary"]
 
     col1, col2 = st.columns([1, 2])  # esquerda menor, direita maior
 
@@ -124,6 +148,7 @@ with summary_tab:
 # Separador visual
     st.markdown("---")
     # Barras: média diária de minutos por faixa de temperatura
+    df_temp_ranges = load(("temp_ranges",))["temp_ranges"]
     if df_temp_ranges is not None and not df_temp_ranges.empty:
         chart_col = column_chart(
             df_temp_ranges,
@@ -132,13 +157,18 @@ with summary_tab:
             title="Média Diária de Minutos por Faixa de Temperatura(ºC)",
             show_labels=True,
             label_position="fora",
-            label_color="black"
+            label_color="black",
+            x_sort=None  # ordem das faixas (coluna "ordernar"), não alfabética
         )
         st.altair_chart(chart_col, use_container_width=True)
         st.caption("Quanto tempo, em média por dia, o processador ficou em cada faixa de temperatura.")
 
-# Aba "Séries por Hora": padrões ao longo do dia
-with series_tab:
+# Visão "Séries por Hora": padrões ao longo do dia
+elif view == "Séries por Hora":
+    data = load(("time_vs_temp", "time_vs_power"))
+    df_time_vs_temp = data["time_vs_temp"]
+    df_time_vs_power = data["time_vs_power"]
+
     st.subheader("Padrões ao longo do dia")
     # Duas colunas: Gráficos de linhas
     col1, col2 = st.columns(2, gap="medium")
@@ -171,8 +201,12 @@ with series_tab:
     st.caption("Padrões da temperatura e consumo de energia durante o dia.")
 
 
-# Aba "Relações": correlação visual entre variáveis
-with relations_tab:
+# Visão "Relações": correlação visual entre variáveis
+elif view == "Relações":
+    data = load(("temp_vs_speed", "temp_vs_power"))
+    df_temp_vs_speed = data["temp_vs_speed"]
+    df_temp_vs_power = data["temp_vs_power"]
+
     st.subheader("Relações entre variáveis")
     # Duas colunas: Gráficos de linhas
     col1, col2 = st.columns(2, gap="medium")
@@ -201,4 +235,25 @@ with relations_tab:
             )
             st.altair_chart(chart, use_container_width=True)
 
-    st.caption("Variações da velocidade e energia do CPU em relação à temperatura.")
\ No newline at end of file
+    st.caption("Variações da velocidade e energia do CPU em relação à temperatura.")
+
+
+# Pré-busca: com a página já desenhada, as séries das outras visões vão para o cache do mesmo filtro
+for other_view, groups in VIEW_DATASETS.items():
+    if other_view != view:
+        for names in groups:
+            load(names)
+
+
+# Perfil das consultas desta execução (DASHBOARD_PROFILE em config.py), depois da pré-busca
+if DASHBOARD_PROFILE:
+    profile_calls = profiling.calls()
+    profiling.write(profile_calls)
+    with st.sidebar.expander("Perfil das consultas"):
+        st.dataframe(profiling.summary(profile_calls), hide_index=True)
+        for call in profile_calls:
+            for query in call.queries:
+                scans = f" | varredura completa: {', '.join(query.full_scans)}" if query.full_scans else ""
+                st.caption(f"{call.function}: {query.seconds * 1000:.1f} ms, {query.rows} linhas, {query.vm_steps} instruções VM{scans}")
+                st.code("\n".join(query.plan), language=None)
+        st.caption(f"Registro em: {profiling.DASHBOARD_PROFILE_PATH}")
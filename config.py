@@ -13,4 +13,75 @@ LOADED_PROCESSED_DIR = os.path.join(DATA_DIR, "loaded_processed")
 # Caminho do Banco de Dados
 DB_NAME = "telemetria.db"
 DB_PATH = os.path.join(DATA_DIR, DB_NAME)
-DB_CONNECTION_STRING = f"sqlite:///{DB_PATH}"
\ No newline at end of file
+DB_CONNECTION_STRING = f"sqlite:///{DB_PATH}"
+
+# Ingestão em streaming: quantidade de linhas lidas/inseridas por bloco
+CHUNK_SIZE = 100_000
+
+# PRAGMAs de SQLite aplicados a cada conexão (src/database.py), em ordem: ETL e demais escritas.
+# auto_vacuum vem antes de journal_mode: em um arquivo novo, o WAL grava o cabeçalho e o modo não muda mais
+# (em bancos existentes não tem efeito; a retenção ativa o modo incremental com um VACUUM, uma única vez)
+INGEST_PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -131072,  # em KiB (128 MB)
+    "temp_store": "MEMORY",
+}
+
+# ... e dashboard: somente leitura (em WAL, as leituras não esperam pelas escritas do ETL)
+DASHBOARD_PRAGMAS = {
+    "query_only": 1,
+    "mmap_size": 268_435_456,  # 256 MB
+    "cache_size": -65536,  # em KiB (64 MB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # ms
+}
+
+# Cache das consultas do dashboard: entradas mantidas por função (as menos usadas saem primeiro) e cópia
+# em disco (.streamlit/cache), que mantém o cache entre reinícios. Invalidado a cada carga (geração dos dados)
+DASHBOARD_CACHE_MAX_ENTRIES = 256
+DASHBOARD_CACHE_PERSIST = False
+
+# Perfil das consultas do dashboard (depuração): tempo, linhas, acerto de cache e EXPLAIN QUERY PLAN de
+# cada chamada, exibidos na barra lateral e acrescentados a DASHBOARD_PROFILE_PATH (uma linha JSON por chamada)
+DASHBOARD_PROFILE = False
+DASHBOARD_PROFILE_PATH = os.path.join(DATA_DIR, "dashboard_profile.jsonl")
+
+# Modo follow (logs ainda em gravação): intervalo de verificação e bytes lidos por ciclo
+FOLLOW_POLL_SECONDS = 2.0
+FOLLOW_MAX_BYTES = 8 * 1024 * 1024
+
+# Manifesto de ingestão: bytes lidos do início e do fim de cada arquivo para a impressão digital
+MANIFEST_SAMPLE_BYTES = 64 * 1024
+
+# Bytes lidos do início de cada log para detectar o layout (cabeçalho do Core Temp)
+LAYOUT_PEEK_BYTES = 16 * 1024
+
+# Métricas do ETL (uma linha JSON por arquivo e por execução) e perfis cProfile (--profile)
+METRICS_PATH = os.path.join(DATA_DIR, "etl_metrics.jsonl")
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+
+# Formato dos arquivos processados em LOADED_PROCESSED_DIR ("csv" ou "parquet") e compressão do Parquet
+PROCESSED_FORMAT = "csv"
+PARQUET_COMPRESSION = "zstd"
+
+# Arquivamento dos logs carregados em LOADED_RAW_DIR: compactados com gzip (.csv.gz) ao serem movidos
+ARCHIVE_GZIP = True
+ARCHIVE_GZIP_LEVEL = 6
+
+# Partições mensais: meses encerrados há mais de PARTITION_SEAL_AFTER_DAYS dias saem do banco
+# principal para um arquivo por mês em PARTITION_DIR (imutável; pode ser copiado isoladamente)
+PARTITION_DIR = os.path.join(DATA_DIR, "partitions")
+PARTITION_SEAL_AFTER_DAYS = 7
+
+# Retenção (python run_pipeline.py --apply-retention): amostras de raw_data por RETENTION_RAW_DAYS dias e
+# rollup por minuto por RETENTION_MINUTE_DAYS dias (nunca menos que as amostras, das quais é recalculado);
+# rollups por hora e por dia são mantidos sempre. None mantém tudo.
+# O banco principal é apagado em lotes de RETENTION_BATCH_ROWS linhas, uma transação curta cada.
+RETENTION_RAW_DAYS = 180
+RETENTION_MINUTE_DAYS = 730
+RETENTION_BATCH_ROWS = 50_000
+
+# Migrações do esquema: linhas convertidas por lote (cada lote é uma transação)
+MIGRATION_BATCH_ROWS = 200_000
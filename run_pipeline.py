@@ -1,22 +1,139 @@
 # Objetivo: Orquestrar o fluxo ETL:
 
+import argparse
 import src.etl.pipeline as pipeline
-from src.models import ensure_sqlite_database_and_table
+import src.etl.follow as follow
+from config import CHUNK_SIZE, FOLLOW_POLL_SECONDS, PROCESSED_FORMAT
+from src.migrations import migrate
+from src.rollups import bump_data_generation, rebuild_rollups, refresh_calendar
+from src.partitions import seal_closed_months
+from src.retention import apply_retention, pruned_before
+from src.database import engine
 
-print("---Iniciando aplicação ---")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pipeline ETL de telemetria da CPU (Core Temp -> SQLite).")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Processa cada arquivo em blocos, com uso de memória limitado (recomendado para logs grandes)."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help=f"Linhas por bloco no modo --stream (padrão: {CHUNK_SIZE})."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Número de processos para leitura/limpeza em paralelo (padrão: 1). Não combinável com --stream."
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Acompanha os logs ainda em gravação em data/raw, inserindo as novas linhas continuamente (Ctrl+C encerra)."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=FOLLOW_POLL_SECONDS,
+        help=f"Segundos entre verificações no modo --follow (padrão: {FOLLOW_POLL_SECONDS})."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="ARQUIVO",
+        help="Gera um perfil cProfile do processamento do arquivo indicado (nome em data/raw), salvo em data/profiles."
+    )
+    parser.add_argument(
+        "--processed-format",
+        choices=["csv", "parquet"],
+        default=PROCESSED_FORMAT,
+        help=f"Formato da cópia em data/loaded_processed (padrão: {PROCESSED_FORMAT}). Parquet requer pyarrow."
+    )
+    parser.add_argument(
+        "--partition-by-day",
+        action="store_true",
+        help="Com --processed-format parquet, grava um diretório por dia (day=AAAA-MM-DD)."
+    )
+    parser.add_argument(
+        "--reingest",
+        action="store_true",
+        help="Reprocessa os logs arquivados em data/loaded_raw (.csv e .csv.gz), sem movê-los; conteúdos já carregados são pulados."
+    )
+    parser.add_argument(
+        "--rebuild-rollups",
+        action="store_true",
+        help="Recalcula as tabelas de rollup (minuto/hora/dia) do banco principal a partir de raw_data e encerra "
+             "(as partições mensais têm os rollups recalculados ao serem seladas)."
+    )
+    parser.add_argument(
+        "--apply-retention",
+        action="store_true",
+        help="Aplica a política de retenção (RETENTION_* em config.py) ao banco e às partições e encerra."
+    )
+    parser.add_argument(
+        "--seal-months",
+        action="store_true",
+        help="Move os meses encerrados do banco principal para as partições mensais (data/partitions) e encerra."
+    )
+    args = parser.parse_args()
+    if args.stream and args.jobs > 1:
+        parser.error("--stream e --jobs > 1 não podem ser usados juntos.")
+    if args.profile and args.jobs > 1:
+        parser.error("--profile requer --jobs 1 (a leitura roda em outros processos com --jobs).")
+    if args.reingest and args.follow:
+        parser.error("--reingest e --follow não podem ser usados juntos.")
+    if args.partition_by_day and args.processed_format != "parquet":
+        parser.error("--partition-by-day requer --processed-format parquet.")
+    return args
 
 def main():
+    args = parse_args()
+    # Dentro de main(): os processos de --jobs reimportam este módulo
+    print("---Iniciando aplicação ---")
     try:
-        # Garante a estrutura do banco de dados
-        ensure_sqlite_database_and_table()
+        # Garante a estrutura do banco de dados (cria ou aplica as migrações pendentes)
+        migrate()
+
+        if args.rebuild_rollups:
+            print('\n--- Recalculando rollups ---')
+            with engine.begin() as conn:
+                rebuild_rollups(conn, since=pruned_before(conn))
+                refresh_calendar(conn)
+                bump_data_generation(conn)
+            print("Rollups recalculados com sucesso.")
+            return
+
+        if args.apply_retention:
+            print('\n--- Aplicando política de retenção ---')
+            apply_retention()
+            return
+
+        if args.seal_months:
+            print('\n--- Selando meses encerrados ---')
+            if not seal_closed_months():
+                print("Nenhum mês encerrado no banco principal.")
+            return
+
+        if args.follow:
+            follow.follow(poll_interval=args.poll_interval)
+            return
+
+        print('\n--- Executando pipeline ---')
 
-        print('\n--- Executando pipeline ---') 
-    
         # Executa todo o ciclo (Extract -> Transform -> Load -> Archive)
-        pipeline.run_etl() 
+        pipeline.run_etl(
+            chunk_size=args.chunk_size if args.stream else None,
+            jobs=args.jobs,
+            profile_file=args.profile,
+            processed_format=args.processed_format,
+            partition_by_day=args.partition_by_day,
+            reingest=args.reingest
+        )
 
         print("\nCiclo ETL concluído com sucesso.")
-        input("\nPressione Enter para sair...") 
+        input("\nPressione Enter para sair...")
 
     except Exception as e:
         print(f"!!! ERRO fatal durante a execução: {e}")
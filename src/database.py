@@ -1,9 +1,29 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from config import DB_CONNECTION_STRING
+from config import DB_CONNECTION_STRING, INGEST_PRAGMAS, DASHBOARD_PRAGMAS
 
-def get_engine():
-    return create_engine(DB_CONNECTION_STRING)
+# PRAGMAs aplicados a cada conexão nova do engine, por papel:
+# "ingest" para o ETL e demais escritas, "dashboard" para as consultas (somente leitura)
+ENGINE_PROFILES = {
+    "ingest": INGEST_PRAGMAS,
+    "dashboard": DASHBOARD_PRAGMAS,
+}
+
+def get_engine(role="ingest"):
+    """Engine do banco principal com os PRAGMAs do perfil `role` (ENGINE_PROFILES).
+
+    Os PRAGMAs são aplicados no evento 'connect', antes de qualquer transação
+    (journal_mode não pode mudar dentro de uma).
+    """
+    pragmas = ENGINE_PROFILES[role]
+    engine = create_engine(DB_CONNECTION_STRING)
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        for pragma, value in pragmas.items():
+            dbapi_connection.execute(f"PRAGMA {pragma} = {value}")
+
+    return engine
 
 # Instância global do engine e Session para ser importada
 engine = get_engine()
@@ -0,0 +1,90 @@
+# Modo follow: ingere continuamente as linhas novas dos logs do Core Temp ainda em gravação.
+# A posição lida de cada arquivo fica na tabela follow_state, gravada na mesma transação das linhas.
+
+import os
+import time
+from config import RAW_DIR, FOLLOW_POLL_SECONDS, FOLLOW_MAX_BYTES
+from src.database import Session
+from src.etl.load import insert_dataframe, get_follow_state, save_follow_state
+from src.etl.layout import detect_layout
+from src.etl.pipeline import parse_raw_lines
+from src.rollups import bump_data_generation, refresh_calendar, refresh_rollups, to_epoch
+from src.retention import pruned_before
+
+
+def ingest_appended_lines(session, file_path):
+    """Insere as linhas completas acrescentadas ao arquivo desde a última leitura.
+
+    Lê apenas os bytes novos (no máximo FOLLOW_MAX_BYTES por chamada) e retorna o número de linhas inseridas.
+    """
+    file_name = os.path.basename(file_path)
+    size = os.path.getsize(file_path)
+    state = get_follow_state(session, file_name)
+
+    layout = detect_layout(file_path)
+    if layout is None:
+        return 0  # cabeçalho ainda incompleto
+
+    if state is None or size < state[0]:
+        # Arquivo novo ou truncado: começa na primeira linha de dados
+        start = layout.data_start
+        if state is not None:
+            print(f"   -> {file_name}: arquivo truncado, relendo a partir do início.")
+        offset, last_time = start, state[1] if state else None
+    else:
+        offset, last_time = state
+
+    if size <= offset:
+        return 0
+
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        buffer = f.read(min(size - offset, FOLLOW_MAX_BYTES))
+
+    # Apenas linhas completas; a última linha pode estar sendo escrita
+    end = buffer.rfind(b'\n')
+    if end < 0:
+        return 0
+    buffer = buffer[:end + 1]
+
+    df = parse_raw_lines(buffer, layout)
+    if last_time is not None:
+        df = df[df['time'] > last_time]
+
+    rows = 0
+    if not df.empty:
+        rows, _, _ = insert_dataframe(session, df)
+        last_time = df['time'].max()
+        if rows:
+            # Rollups antes da marca de retenção são definitivos (as amostras anteriores são descartadas)
+            start, floor = to_epoch(df['time'].min()), pruned_before(session)
+            start = start if floor is None else max(start, floor)
+            refresh_rollups(session, start, last_time)
+            refresh_calendar(session, start, last_time)
+            bump_data_generation(session)
+
+    save_follow_state(session, file_name, offset + len(buffer), last_time)
+    return rows
+
+
+def follow(poll_interval=FOLLOW_POLL_SECONDS):
+    """Monitora RAW_DIR e ingere as novas amostras a cada `poll_interval` segundos, até Ctrl+C."""
+    print(f"\n--- Modo follow: monitorando '{RAW_DIR}' a cada {poll_interval}s (Ctrl+C para encerrar) ---")
+
+    with Session() as session:
+        try:
+            while True:
+                files = sorted(f for f in os.listdir(RAW_DIR) if f.endswith('.csv'))
+                for file_name in files:
+                    try:
+                        rows = ingest_appended_lines(session, os.path.join(RAW_DIR, file_name))
+                        # Transação pequena por arquivo/ciclo
+                        session.commit()
+                        if rows:
+                            print(f"{file_name}: {rows} novas linhas inseridas.")
+                    except Exception as e:
+                        session.rollback()
+                        print(f"!!! Erro ao acompanhar {file_name}: {e}")
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("\n--- Modo follow encerrado. ---")
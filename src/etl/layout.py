@@ -0,0 +1,174 @@
+# Detecção do layout dos logs do Core Temp e leitura com uma única passada pelo arquivo.
+# O início do arquivo é lido uma vez; o mapeamento de colunas é compilado e cacheado
+# pela impressão digital do formato (linha de cabeçalho ou quantidade de campos).
+
+import gzip
+import hashlib
+import re
+from dataclasses import dataclass
+import pandas as pd
+from config import LAYOUT_PEEK_BYTES
+from src.models import ETL_DTYPES
+
+RAW_COLUMNS = ['Time', 'Core 0 Temp. (°)', 'Core 1 Temp. (°)', 'Core 2 Temp. (°)',
+               'Core 3 Temp. (°)', 'Core 4 Temp. (°)', 'Core 5 Temp. (°)',
+               'Low temp. (°)', 'High temp. (°)', 'Core load (%)', 'Core speed (MHz)',
+               'Low temp. (°).1', 'High temp. (°).1', 'Core load (%).1',
+               'Core speed (MHz).1', 'Low temp. (°).2', 'High temp. (°).2',
+               'Core load (%).2', 'Core speed (MHz).2', 'Low temp. (°).3',
+               'High temp. (°).3', 'Core load (%).3', 'Core speed (MHz).3',
+               'Low temp. (°).4', 'High temp. (°).4', 'Core load (%).4',
+               'Core speed (MHz).4', 'Low temp. (°).5', 'High temp. (°).5',
+               'Core load (%).5', 'Core speed (MHz).5', 'CPU 0 Power']
+
+COLUMNS_TO_KEEP = [
+        'Time',
+        'Core 0 Temp. (°)', 'Core load (%)', 'Core speed (MHz)',
+        'Core 1 Temp. (°)', 'Core load (%).1', 'Core speed (MHz).1',
+        'Core 2 Temp. (°)', 'Core load (%).2', 'Core speed (MHz).2',
+        'Core 3 Temp. (°)', 'Core load (%).3', 'Core speed (MHz).3',
+        'Core 4 Temp. (°)', 'Core load (%).4', 'Core speed (MHz).4',
+        'Core 5 Temp. (°)', 'Core load (%).5', 'Core speed (MHz).5',
+        'CPU 0 Power'
+]
+
+RENAME_COLUMNS = {
+    "Time": "time",
+    "Core 0 Temp. (°)": "core_temp_0", "Core load (%)": "core_load_0", "Core speed (MHz)": "core_speed_0",
+    "Core 1 Temp. (°)": "core_temp_1", "Core load (%).1": "core_load_1", "Core speed (MHz).1": "core_speed_1",
+    "Core 2 Temp. (°)": "core_temp_2", "Core load (%).2": "core_load_2", "Core speed (MHz).2": "core_speed_2",
+    "Core 3 Temp. (°)": "core_temp_3", "Core load (%).3": "core_load_3", "Core speed (MHz).3": "core_speed_3",
+    "Core 4 Temp. (°)": "core_temp_4", "Core load (%).4": "core_load_4", "Core speed (MHz).4": "core_speed_4",
+    "Core 5 Temp. (°)": "core_temp_5", "Core load (%).5": "core_load_5", "Core speed (MHz).5": "core_speed_5",
+    "CPU 0 Power": "cpu_power"
+}
+
+DATA_LINE_PATTERN = re.compile(rb'^\d{2}:\d{2}:\d{2} ')
+
+
+@dataclass(frozen=True)
+class Layout:
+    """Layout de um arquivo: onde começam os dados e quais colunas ler (posição -> nome final)."""
+    fingerprint: str
+    skiprows: int          # linhas antes da primeira linha de dados
+    data_start: int        # offset (bytes) da primeira linha de dados
+    n_fields: int          # campos por linha de dados (inclui o campo vazio da vírgula final)
+    columns: dict          # posição no arquivo -> nome final (ex.: 9 -> 'core_load_0')
+    dtypes: dict           # posição no arquivo -> dtype de leitura
+
+    @property
+    def output_columns(self):
+        """Nomes finais na ordem de COLUMNS_TO_KEEP."""
+        order = {RENAME_COLUMNS[c]: i for i, c in enumerate(COLUMNS_TO_KEEP)}
+        return sorted(self.columns.values(), key=order.get)
+
+
+# Mapeamentos compilados, por impressão digital do formato
+_compiled_layouts = {}
+
+
+def mangle_header(fields):
+    """Nomeia colunas repetidas como o pandas ('Core load (%)', 'Core load (%).1', ...)."""
+    seen = {}
+    names = []
+    for field in fields:
+        count = seen.get(field, 0)
+        names.append(field if count == 0 else f"{field}.{count}")
+        seen[field] = count + 1
+    return names
+
+
+def compile_columns(raw_names):
+    """Monta (posição -> nome final, posição -> dtype) para as colunas mantidas.
+
+    Os dtypes vêm do esquema (ETL_DTYPES): Int16 anulável para temperaturas, float32 para o restante.
+    """
+    columns = {}
+    for position, name in enumerate(raw_names):
+        if name in COLUMNS_TO_KEEP:
+            columns[position] = RENAME_COLUMNS[name]
+    dtypes = {position: (str if name == 'time' else ETL_DTYPES[name]) for position, name in columns.items()}
+    return columns, dtypes
+
+
+def open_log(file_path):
+    """Abre um log em modo binário; logs arquivados (.gz) são descompactados em memória, por streaming."""
+    return gzip.open(file_path, 'rb') if file_path.endswith('.gz') else open(file_path, 'rb')
+
+
+def detect_layout(file_path, peek_bytes=LAYOUT_PEEK_BYTES):
+    """Lê apenas o início do arquivo e retorna seu Layout, ou None se ainda não há linha de dados."""
+    with open_log(file_path) as f:
+        head = f.read(peek_bytes)
+    return layout_from_head(head)
+
+
+def layout_from_head(head):
+    """Detecta o Layout a partir dos primeiros bytes do arquivo."""
+    offset = 0
+    previous_line = None
+    for line_number, line in enumerate(head.splitlines(keepends=True)):
+        if DATA_LINE_PATTERN.match(line):
+            header = previous_line if previous_line and previous_line.startswith(b'Time,') else None
+            n_fields = line.count(b',') + 1
+            if header is not None:
+                fingerprint = hashlib.sha1(header.strip()).hexdigest()[:16]
+            else:
+                fingerprint = f"sem-cabecalho-{n_fields}"
+
+            if fingerprint not in _compiled_layouts:
+                if header is not None:
+                    fields = [f.strip() for f in header.decode('latin1').strip().split(',')]
+                    raw_names = mangle_header(fields)
+                else:
+                    # Sem cabeçalho: os nomes do modelo até a quantidade de campos da linha
+                    raw_names = RAW_COLUMNS[:n_fields]
+                _compiled_layouts[fingerprint] = compile_columns(raw_names)
+
+            columns, dtypes = _compiled_layouts[fingerprint]
+            return Layout(fingerprint, line_number, offset, n_fields, columns, dtypes)
+
+        offset += len(line)
+        if line.strip():
+            previous_line = line
+    return None
+
+
+def read_with_layout(source, layout, chunksize=None, skip_preamble=True, strict=True):
+    """Lê um CSV do Core Temp com uma única chamada a read_csv (usecols + dtypes explícitos).
+
+    `source` pode ser um caminho (.csv ou .csv.gz) ou um buffer; `skip_preamble=False` para buffers
+    que já começam nos dados.
+    Com `strict=False`, as colunas numéricas são lidas como texto e convertidas com coerção
+    (valores inválidos viram NaN), para arquivos com linhas extras não numéricas.
+    """
+    dtypes = layout.dtypes if strict else {position: str for position in layout.columns}
+    reader = pd.read_csv(
+        source,
+        encoding="latin1",
+        header=None,
+        skiprows=layout.skiprows if skip_preamble else 0,
+        # Número fixo de campos: blocos só com linhas curtas não mudam as posições
+        names=range(layout.n_fields),
+        usecols=list(layout.columns),
+        dtype=dtypes,
+        chunksize=chunksize
+    )
+    if chunksize:
+        return (name_columns(chunk, layout, strict) for chunk in reader)
+    return name_columns(reader, layout, strict)
+
+
+def name_columns(data, layout, strict=True):
+    """Aplica os nomes finais às colunas lidas por posição e as ordena como COLUMNS_TO_KEEP."""
+    data.columns = [layout.columns[position] for position in data.columns]
+    if not strict:
+        for col in data.columns:
+            if col != 'time':
+                values = pd.to_numeric(data[col], errors='coerce')
+                try:
+                    data[col] = values.astype(ETL_DTYPES[col])
+                except TypeError:
+                    # Ex.: temperatura com casas decimais; mantém float64 em vez de truncar
+                    data[col] = values
+    return data[layout.output_columns]
@@ -1,22 +1,216 @@
-from src.models import TABLE_NAME
+import hashlib
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from config import MANIFEST_SAMPLE_BYTES
+from src.models import TABLE_NAME, FOLLOW_STATE_TABLE_NAME, MANIFEST_TABLE_NAME
+from src.etl.metrics import stage
+from src.etl.layout import open_log
+from src.partitions import sealed_times
+from src.retention import pruned_before
+
+def widen_float32(values):
+    """float32 -> float64 arredondando para 7 algarismos significativos.
+
+    Evita gravar ruído de representação (ex.: 3591.72 -> 3591.719970703125): os valores do
+    Core Temp têm no máximo 7 algarismos, que o float32 preserva.
+    """
+    values = values.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (6 - np.where(np.isfinite(magnitude), magnitude, 0))
+    return np.round(values * scale) / scale
+
+
+def column_values(series):
+    """Converte uma coluna em lista Python, com None no lugar de valores ausentes.
+
+    Trabalha sobre os arrays NumPy da coluna (inteiros anuláveis via máscara, float32 alargado),
+    sem passar por arrays de objetos do pandas.
+    """
+    if pd.api.types.is_extension_array_dtype(series.dtype):
+        mask = series.isna().to_numpy()
+        kind = np.int64 if pd.api.types.is_integer_dtype(series.dtype) else np.float64
+        values = series.to_numpy(dtype=kind, na_value=0).tolist()
+    else:
+        array = series.to_numpy()
+        if array.dtype == np.float32:
+            array = widen_float32(array)
+        mask = np.isnan(array) if array.dtype.kind == 'f' else series.isna().to_numpy()
+        values = array.tolist()
+    if mask.any():
+        for i in np.flatnonzero(mask):
+            values[i] = None
+    return values
+
 
 def insert_dataframe(session, df):
-    """Insere um DataFrame no banco de dados."""
-    
-    # Fazendo cópia para não alterar o original que será salvo em CSV
-    df_to_load = df.copy()
-    if 'time' in df_to_load.columns:
-         try:
-            # Se for datetime, converte. Se já for string, mantém.
-            if not df_to_load['time'].dtype == 'object':
-                 df_to_load['time'] = df_to_load['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-         except:
-             pass
-         df_to_load['time'] = df_to_load['time'].astype(str)
-
-    df_to_load.to_sql(
-        TABLE_NAME,
-        session.connection(),
-        if_exists='append',
-        index=False
+    """Insere um DataFrame no banco de dados, descartando amostras com horário já existente
+    (no banco principal ou nas partições seladas) ou anteriores à marca de retenção de raw_data
+    (src/retention.py).
+
+    Grava direto dos arrays de colunas com `executemany` (instrução preparada única)
+    na conexão sqlite3 da sessão, dentro da transação corrente. Duplicados são
+    removidos em lote: dentro do próprio bloco (drop_duplicates), contra as partições
+    seladas que o bloco intersecta (src/partitions.py) e contra o banco principal
+    (ON CONFLICT(time) DO NOTHING).
+    Retorna (linhas inseridas, linhas descartadas, segundos gastos na inserção).
+    """
+    with stage('insert'):
+        total_rows = len(df)
+        if 'time' in df.columns:
+            df = df.drop_duplicates(subset='time', keep='first')
+            floor = pruned_before(session)
+            if floor is not None:
+                df = df[df['time'] >= pd.Timestamp(floor, unit='s')]
+            if not df.empty and pd.api.types.is_datetime64_any_dtype(df['time']):
+                epochs = df['time'].to_numpy(dtype='datetime64[s]').view(np.int64)
+                sealed = sealed_times(session, epochs.min(), epochs.max())
+                if sealed:
+                    df = df[~np.isin(epochs, sealed)]
+
+        columns = list(df.columns)
+        data = []
+        for col in columns:
+            series = df[col]
+            if col == 'time' and pd.api.types.is_datetime64_any_dtype(series):
+                # Datetime -> segundos desde a época (formato armazenado no banco)
+                data.append(series.to_numpy(dtype='datetime64[s]').view(np.int64).tolist())
+                continue
+            data.append(column_values(series))
+
+        sql = (
+            f"INSERT INTO {TABLE_NAME} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            "ON CONFLICT(time) DO NOTHING"
+        )
+
+        start = time.perf_counter()
+        raw_conn = session.connection().connection.driver_connection
+        changes_before = raw_conn.total_changes
+        raw_conn.executemany(sql, zip(*data))
+        inserted = raw_conn.total_changes - changes_before
+        elapsed = time.perf_counter() - start
+
+        return inserted, total_rows - inserted, elapsed
+
+
+def format_throughput(rows, seconds):
+    """Texto de vazão da carga, ex.: '120000 linhas, 350,000 linhas/s'."""
+    return f"{rows} linhas, {rows / max(seconds, 1e-9):,.0f} linhas/s"
+
+
+def get_follow_state(session, file_name):
+    """Retorna (byte_offset, last_time) gravados pelo modo follow para o arquivo, ou None."""
+    row = session.execute(
+        text(f"SELECT byte_offset, last_time FROM {FOLLOW_STATE_TABLE_NAME} WHERE file_name = :file_name"),
+        {"file_name": file_name}
+    ).first()
+    if row is None:
+        return None
+    last_time = pd.Timestamp(row.last_time) if row.last_time is not None else None
+    return row.byte_offset, last_time
+
+
+def save_follow_state(session, file_name, byte_offset, last_time):
+    """Grava a posição ingerida do arquivo na mesma transação das linhas inseridas."""
+    session.execute(
+        text(f"""
+            INSERT INTO {FOLLOW_STATE_TABLE_NAME} (file_name, byte_offset, last_time, updated_at)
+            VALUES (:file_name, :byte_offset, :last_time, :updated_at)
+            ON CONFLICT(file_name) DO UPDATE SET
+                byte_offset = excluded.byte_offset,
+                last_time = excluded.last_time,
+                updated_at = excluded.updated_at
+            """),
+        {
+            "file_name": file_name,
+            "byte_offset": byte_offset,
+            "last_time": last_time.strftime('%Y-%m-%d %H:%M:%S') if last_time is not None else None,
+            "updated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    )
+
+
+def pop_follow_state(session, file_name):
+    """Remove o estado follow do arquivo e retorna o último horário já ingerido (ou None).
+
+    Usado pelo run_etl ao arquivar um log que já foi parcialmente carregado pelo modo follow.
+    """
+    state = get_follow_state(session, file_name)
+    if state is None:
+        return None
+    session.execute(
+        text(f"DELETE FROM {FOLLOW_STATE_TABLE_NAME} WHERE file_name = :file_name"),
+        {"file_name": file_name}
+    )
+    return state[1]
+
+
+def file_fingerprint(file_path, sample_bytes=MANIFEST_SAMPLE_BYTES):
+    """Impressão digital do conteúdo: SHA-256 do tamanho + início + fim do arquivo.
+
+    Custo constante (lê no máximo 2 x `sample_bytes`), independente do tamanho do log.
+    Logs arquivados (.gz) são descompactados por streaming e geram a mesma impressão do original.
+    """
+    if file_path.endswith('.gz'):
+        return compressed_file_fingerprint(file_path, sample_bytes)
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(size - sample_bytes, sample_bytes))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compressed_file_fingerprint(file_path, sample_bytes=MANIFEST_SAMPLE_BYTES):
+    """file_fingerprint do conteúdo descompactado de um .gz (lê o arquivo inteiro, sem gravar em disco)."""
+    size = 0
+    head = b''
+    tail = b''
+    with open_log(file_path) as f:
+        while block := f.read(1024 * 1024):
+            if len(head) < sample_bytes:
+                head += block[:sample_bytes - len(head)]
+            size += len(block)
+            tail = (tail + block)[-sample_bytes:]
+    digest = hashlib.sha256(str(size).encode())
+    digest.update(head)
+    if size > sample_bytes:
+        digest.update(tail[-min(sample_bytes, size - sample_bytes):])
+    return digest.hexdigest()
+
+
+def find_in_manifest(session, content_hash):
+    """Retorna o registro do manifesto para o conteúdo, ou None se ainda não foi carregado."""
+    return session.execute(
+        text(f"SELECT file_name, rows_loaded, loaded_at FROM {MANIFEST_TABLE_NAME} WHERE content_hash = :content_hash"),
+        {"content_hash": content_hash}
+    ).first()
+
+
+def record_in_manifest(session, content_hash, file_path, rows_loaded, time_min, time_max):
+    """Registra o arquivo carregado no manifesto, na mesma transação dos dados."""
+    stat = os.stat(file_path)
+    session.execute(
+        text(f"""
+            INSERT INTO {MANIFEST_TABLE_NAME}
+                (content_hash, file_name, size_bytes, mtime, rows_loaded, time_min, time_max, loaded_at)
+            VALUES
+                (:content_hash, :file_name, :size_bytes, :mtime, :rows_loaded, :time_min, :time_max, :loaded_at)
+            """),
+        {
+            "content_hash": content_hash,
+            "file_name": os.path.basename(file_path),
+            "size_bytes": stat.st_size,
+            "mtime": datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            "rows_loaded": rows_loaded,
+            "time_min": time_min.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(time_min) else None,
+            "time_max": time_max.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(time_max) else None,
+            "loaded_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
     )
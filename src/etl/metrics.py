@@ -0,0 +1,197 @@
+# Métricas do ETL: tempo por etapa, contadores de linhas/bytes e pico de memória por arquivo.
+# As etapas são cronometradas com `stage(...)` no código do pipeline; fora de `track(...)` não têm efeito.
+# Ao final da carga, cada arquivo vira uma linha JSON em METRICS_PATH e uma linha da tabela-resumo.
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from config import METRICS_PATH, PROFILE_DIR
+
+# Ordem das etapas na tabela-resumo
+STAGES = ['fingerprint', 'sniff', 'parse', 'time', 'insert', 'write', 'move']
+
+# Métricas do arquivo em processamento neste processo (None = instrumentação inativa)
+_current = None
+
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo, em bytes (Windows, Linux e macOS)."""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux informa em KiB
+
+
+@dataclass
+class FileMetrics:
+    """Tempos (segundos por etapa) e contadores de um arquivo."""
+    file_name: str
+    bytes: int = 0
+    rows_read: int = 0
+    rows_clean: int = 0
+    rows_inserted: int = 0
+    duplicates: int = 0
+    skipped: bool = False
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    stages: dict = field(default_factory=dict)
+
+    def add(self, stage_name, seconds):
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def merge(self, other):
+        """Incorpora tempos e linhas lidas medidos em outro processo (workers de --jobs)."""
+        for stage_name, seconds in other.stages.items():
+            self.add(stage_name, seconds)
+        self.rows_read += other.rows_read
+
+
+@contextmanager
+def track(file_metrics):
+    """Ativa `file_metrics` como destino de stage()/count() durante o bloco."""
+    global _current
+    previous = _current
+    _current = file_metrics
+    start = time.perf_counter()
+    try:
+        yield file_metrics
+    finally:
+        file_metrics.seconds += time.perf_counter() - start
+        file_metrics.peak_rss_mb = round(peak_rss_bytes() / 1024 ** 2, 1)
+        _current = previous
+
+
+@contextmanager
+def stage(stage_name):
+    """Cronometra uma etapa do arquivo ativo (sem efeito fora de track)."""
+    if _current is None:
+        yield
+        return
+    file_metrics = _current
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        file_metrics.add(stage_name, time.perf_counter() - start)
+
+
+def count(counter, value):
+    """Soma `value` a um contador do arquivo ativo (ex.: 'rows_read')."""
+    if _current is not None:
+        setattr(_current, counter, getattr(_current, counter) + value)
+
+
+@contextmanager
+def profiled(file_name, enabled):
+    """Com `enabled`, grava um perfil cProfile do bloco em PROFILE_DIR e mostra as funções mais caras."""
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        output_path = os.path.join(PROFILE_DIR, f"{os.path.splitext(file_name)[0]}.prof")
+        profiler.dump_stats(output_path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(15)
+        print(report.getvalue())
+        print(f"   -> Perfil cProfile salvo em: {output_path} (abra com `python -m pstats`).")
+
+
+class RunMetrics:
+    """Métricas de uma execução do ETL: um FileMetrics por arquivo e etapas globais (ex.: commit)."""
+
+    def __init__(self, mode):
+        self.run_id = datetime.now().isoformat(timespec='seconds')
+        self.mode = mode
+        self.files = {}
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def file(self, file_name, path=None):
+        """FileMetrics do arquivo (criado no primeiro acesso)."""
+        if file_name not in self.files:
+            size = os.path.getsize(path) if path and os.path.exists(path) else 0
+            self.files[file_name] = FileMetrics(file_name, bytes=size)
+        return self.files[file_name]
+
+    @contextmanager
+    def run_stage(self, stage_name):
+        """Cronometra uma etapa da execução que não pertence a um arquivo."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage_name] = self.stages.get(stage_name, 0.0) + time.perf_counter() - start
+
+    def records(self):
+        """Linhas do arquivo de métricas: uma por arquivo e uma com o total da execução."""
+        base = {'run_id': self.run_id, 'mode': self.mode}
+        for file_metrics in self.files.values():
+            record = asdict(file_metrics)
+            record['stages'] = {k: round(v, 4) for k, v in record['stages'].items()}
+            record['seconds'] = round(record['seconds'], 4)
+            yield {**base, 'type': 'file', **record}
+        yield {
+            **base,
+            'type': 'run',
+            'files': len(self.files),
+            'bytes': sum(f.bytes for f in self.files.values()),
+            'rows_inserted': sum(f.rows_inserted for f in self.files.values()),
+            'stages': {k: round(v, 4) for k, v in self.stages.items()},
+            'seconds': round(time.perf_counter() - self.started, 4),
+            'peak_rss_mb': round(peak_rss_bytes() / 1024 ** 2, 1),
+        }
+
+    def write(self, path=METRICS_PATH):
+        """Acrescenta as métricas da execução ao arquivo JSON-lines."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def print_summary(self):
+        """Tabela-resumo: segundos por etapa, linhas e vazão de cada arquivo."""
+        header = f"{'arquivo':<24}{'MB':>8}{'lidas':>10}{'inseridas':>11}" + ''.join(f"{s:>12}" for s in STAGES) + f"{'total':>9}{'linhas/s':>11}"
+        print("\n--- Métricas do ETL (segundos por etapa) ---")
+        print(header)
+        for f in self.files.values():
+            rate = f"{f.rows_read / f.seconds:,.0f}" if f.seconds and not f.skipped else '-'
+            print(
+                f"{f.file_name[:23]:<24}{f.bytes / 1024 ** 2:>8.1f}{f.rows_read:>10}{f.rows_inserted:>11}"
+                + ''.join(f"{f.stages.get(s, 0.0):>12.3f}" for s in STAGES)
+                + f"{f.seconds:>9.2f}{rate:>11}"
+            )
+        extra = ', '.join(f"{k}: {v:.3f}s" for k, v in self.stages.items())
+        print(f"Total: {time.perf_counter() - self.started:.2f}s | pico de memória: "
+              f"{peak_rss_bytes() / 1024 ** 2:.0f} MB" + (f" | {extra}" if extra else ''))
@@ -0,0 +1,102 @@
+# Gravação dos arquivos processados em LOADED_PROCESSED_DIR: CSV (padrão, compatível) ou Parquet.
+# O Parquet mantém os tipos do DataFrame (horário, Int16, float32), é comprimido e pode ser
+# particionado por dia (diretório <arquivo>.parquet/day=AAAA-MM-DD/). Requer o pacote pyarrow.
+
+import os
+import shutil
+from config import LOADED_PROCESSED_DIR, PARQUET_COMPRESSION
+
+PROCESSED_FORMATS = ('csv', 'parquet')
+
+
+def require_pyarrow():
+    """Importa o pyarrow sob demanda, com erro claro se não estiver instalado."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("O formato parquet requer o pacote pyarrow (pip install pyarrow).") from e
+    return pyarrow, pyarrow.parquet
+
+
+def processed_path(file_name, processed_format='csv', directory=LOADED_PROCESSED_DIR):
+    """Caminho de saída do arquivo processado (f1.csv ou f1.csv.gz -> f1.csv ou f1.parquet)."""
+    file_name = file_name.removesuffix('.gz')
+    if processed_format == 'csv':
+        return os.path.join(directory, file_name)
+    return os.path.join(directory, f"{os.path.splitext(file_name)[0]}.parquet")
+
+
+def read_processed(path):
+    """Lê um arquivo processado (CSV ou Parquet, particionado ou não) como DataFrame."""
+    import pandas as pd
+    if path.endswith('.parquet'):
+        require_pyarrow()
+        return pd.read_parquet(path)
+    return pd.read_csv(path, parse_dates=['time'])
+
+
+class ProcessedWriter:
+    """Grava o DataFrame processado de um arquivo, de uma vez ou em blocos (modo streaming)."""
+
+    def __init__(self, path, processed_format='csv', partition_by_day=False):
+        if processed_format not in PROCESSED_FORMATS:
+            raise ValueError(f"Formato de saída desconhecido: {processed_format} (use {', '.join(PROCESSED_FORMATS)}).")
+        if partition_by_day and processed_format != 'parquet':
+            raise ValueError("O particionamento por dia requer o formato parquet.")
+        self.path = path
+        self.processed_format = processed_format
+        self.partition_by_day = partition_by_day
+        self.parts = 0
+        self._writer = None
+        self._schema = None
+        if processed_format == 'parquet':
+            self._pa, self._pq = require_pyarrow()
+            # Reprocessamento após falha: descarta a saída anterior do mesmo arquivo
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, data):
+        """Acrescenta um bloco (o primeiro bloco cria o arquivo)."""
+        if self.processed_format == 'csv':
+            data.to_csv(self.path, index=False, mode='w' if self.parts == 0 else 'a', header=(self.parts == 0))
+        else:
+            self._write_parquet(data)
+        self.parts += 1
+
+    def _write_parquet(self, data):
+        table = self._pa.Table.from_pandas(data, preserve_index=False)
+        # Todos os blocos com o mesmo esquema do primeiro
+        if self._schema is None:
+            self._schema = table.schema
+        elif table.schema != self._schema:
+            table = table.cast(self._schema)
+
+        if self.partition_by_day:
+            day = self._pa.compute.cast(table['time'], self._pa.date32())
+            self._pq.write_to_dataset(
+                table.append_column('day', day),
+                self.path,
+                partition_cols=['day'],
+                basename_template=f"part-{self.parts}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore',
+                compression=PARQUET_COMPRESSION
+            )
+        else:
+            if self._writer is None:
+                self._writer = self._pq.ParquetWriter(self.path, self._schema, compression=PARQUET_COMPRESSION)
+            self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
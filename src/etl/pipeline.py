@@ -1,144 +1,362 @@
-import pandas as pd
+import gzip
+import io
 import os
 import shutil
-import re
-from config import RAW_DIR, LOADED_RAW_DIR, LOADED_PROCESSED_DIR
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from config import (
+    RAW_DIR, LOADED_RAW_DIR, LOADED_PROCESSED_DIR, CHUNK_SIZE, PROCESSED_FORMAT, ARCHIVE_GZIP, ARCHIVE_GZIP_LEVEL
+)
 from src.database import Session
-from src.etl.load import insert_dataframe
+from src.rollups import RollupRanges
+from src.partitions import seal_closed_months
+from src.retention import pruned_before
+from src.etl.layout import detect_layout, read_with_layout
+from src.etl.timestamps import to_core_temp_datetime
+from src.etl.metrics import RunMetrics, FileMetrics, track, stage, count, profiled
+from src.etl.output import ProcessedWriter, processed_path, require_pyarrow
+from src.etl.load import (
+    insert_dataframe, format_throughput, pop_follow_state,
+    file_fingerprint, find_in_manifest, record_in_manifest
+)
 
 # Garante que diretórios-alvo existam
 os.makedirs(LOADED_RAW_DIR, exist_ok=True)
 os.makedirs(LOADED_PROCESSED_DIR, exist_ok=True)
 os.makedirs(RAW_DIR, exist_ok=True)
 
-def process_file_to_df(file_path):
+def read_cleaned(source, layout, skip_preamble=True):
+    """Lê o arquivo (ou buffer) com o layout detectado e retorna (DataFrame limpo, linhas lidas).
+
+    A leitura usa dtypes explícitos e compactos; se o arquivo tiver valores não numéricos ou
+    fora do tipo (ex.: linhas extras no final do log), relê com conversão tolerante.
+    """
+    with stage('parse'):
+        try:
+            data = read_with_layout(source, layout, skip_preamble=skip_preamble)
+        except (ValueError, TypeError):
+            print("   -> Aviso: valores não numéricos encontrados; relendo com conversão tolerante.")
+            if isinstance(source, io.BytesIO):
+                source.seek(0)
+            data = read_with_layout(source, layout, skip_preamble=skip_preamble, strict=False)
+    count('rows_read', len(data))
+    return clean_dataframe(data), len(data)
+
+
+def get_layout(file_path):
+    """Detecta o layout do arquivo (lendo só o início), com erro claro se não houver dados."""
+    with stage('sniff'):
+        layout = detect_layout(file_path)
+    if layout is None:
+        raise ValueError(f"Formato não reconhecido (nenhuma linha de dados no início de {file_path}).")
+    return layout
+
+
+def parse_raw_lines(buffer, layout):
+    """Converte linhas de dados brutas (bytes, sem cabeçalho) em um DataFrame limpo."""
+    data, _ = read_cleaned(io.BytesIO(buffer), layout, skip_preamble=False)
+    return data
+
+
+def clean_dataframe(data):
+    """Converte o horário e descarta linhas sem horário válido (colunas já selecionadas e renomeadas)."""
+    with stage('time'):
+        data["time"] = to_core_temp_datetime(data["time"])
+        return data.dropna(subset=["time"])
+
+
+def process_file_to_df(file_path, verbose=True):
     """Lê e processa um arquivo CSV, retornando um DataFrame limpo."""
-    
-    datetime_sniffer = pd.read_csv(file_path, encoding="latin1", nrows=0).columns.tolist()
-    first_value = datetime_sniffer[0]
-    time_pattern = r'^\d{2}:\d{2}:\d{2}'
-    data = None
-
-    if re.match(time_pattern, first_value):
-        data = pd.read_csv(file_path, encoding="latin1", header=None)
-        data = data.dropna(axis=1, how='all')
-        data = data.dropna(axis=0, how='all')
-        
-        cols = ['Time', 'Core 0 Temp. (°)', 'Core 1 Temp. (°)', 'Core 2 Temp. (°)',
-                'Core 3 Temp. (°)', 'Core 4 Temp. (°)', 'Core 5 Temp. (°)',
-                'Low temp. (°)', 'High temp. (°)', 'Core load (%)', 'Core speed (MHz)',
-                'Low temp. (°).1', 'High temp. (°).1', 'Core load (%).1',
-                'Core speed (MHz).1', 'Low temp. (°).2', 'High temp. (°).2',
-                'Core load (%).2', 'Core speed (MHz).2', 'Low temp. (°).3',
-                'High temp. (°).3', 'Core load (%).3', 'Core speed (MHz).3',
-                'Low temp. (°).4', 'High temp. (°).4', 'Core load (%).4',
-                'Core speed (MHz).4', 'Low temp. (°).5', 'High temp. (°).5',
-                'Core load (%).5', 'Core speed (MHz).5', 'CPU 0 Power']
-        
-        # Ajuste preventivo para mismatch de colunas
-        if data.shape[1] == len(cols):
-            data.columns = cols
-        else:
-             # Tenta atribuir mesmo assim, ou ajusta o slicing
-             data.columns = cols[:data.shape[1]]
-
-    else:
-        data = pd.read_csv(file_path, encoding="latin1", skiprows=7)
-        data = data.dropna(axis=1, how='all')
-        data = data.dropna(axis=0, how='all')
-
-    initial_rows = len(data)
-    print(f"   -> Linhas lidas: {initial_rows}")
+    data, initial_rows = read_cleaned(file_path, get_layout(file_path))
 
-    data["Time"] = pd.to_datetime(data["Time"], format="%H:%M:%S %m/%d/%y", errors="coerce")
-    data = data.dropna(subset=["Time"]) 
-
-    # Seleção e Renomeação
-    columns_to_keep = [
-            'Time',
-            'Core 0 Temp. (°)', 'Core load (%)', 'Core speed (MHz)',
-            'Core 1 Temp. (°)', 'Core load (%).1', 'Core speed (MHz).1',
-            'Core 2 Temp. (°)', 'Core load (%).2', 'Core speed (MHz).2',
-            'Core 3 Temp. (°)', 'Core load (%).3', 'Core speed (MHz).3',
-            'Core 4 Temp. (°)', 'Core load (%).4', 'Core speed (MHz).4',
-            'Core 5 Temp. (°)', 'Core load (%).5', 'Core speed (MHz).5',
-            'CPU 0 Power'
-    ]
-    
-    # Filtra colunas existentes
-    valid_cols = [c for c in columns_to_keep if c in data.columns]
-    data = data[valid_cols]
-
-    rename_columns = {
-        "Time": "time",
-        "Core 0 Temp. (°)": "core_temp_0", "Core load (%)": "core_load_0", "Core speed (MHz)": "core_speed_0",
-        "Core 1 Temp. (°)": "core_temp_1", "Core load (%).1": "core_load_1", "Core speed (MHz).1": "core_speed_1",
-        "Core 2 Temp. (°)": "core_temp_2", "Core load (%).2": "core_load_2", "Core speed (MHz).2": "core_speed_2",
-        "Core 3 Temp. (°)": "core_temp_3", "Core load (%).3": "core_load_3", "Core speed (MHz).3": "core_speed_3",
-        "Core 4 Temp. (°)": "core_temp_4", "Core load (%).4": "core_load_4", "Core speed (MHz).4": "core_speed_4",
-        "Core 5 Temp. (°)": "core_temp_5", "Core load (%).5": "core_load_5", "Core speed (MHz).5": "core_speed_5",
-        "CPU 0 Power": "cpu_power"
-    }
-    data.rename(columns=rename_columns, inplace=True)
+    if verbose:
+        print(f"   -> Linhas lidas: {initial_rows}")
 
     final_rows = len(data)
-    print(f"   -> Linhas após limpeza: {final_rows}")
-    
+    if verbose:
+        print(f"   -> Linhas após limpeza: {final_rows}")
+
     return data
 
 
-def run_etl():
+def parse_and_save(source_path, output_path, processed_format='csv', partition_by_day=False):
+    """Etapa executada nos processos de trabalho (--jobs): processa o arquivo e grava o processado.
+
+    Retorna (DataFrame, linhas lidas, métricas do worker) para que o processo principal faça a inserção.
+    """
+    with track(FileMetrics(os.path.basename(source_path))) as worker_metrics:
+        data, initial_rows = read_cleaned(source_path, get_layout(source_path))
+        with stage('write'), ProcessedWriter(output_path, processed_format, partition_by_day) as writer:
+            writer.write(data)
+    return data, initial_rows, worker_metrics
+
+
+def ordered_parallel_map(executor, fn, args_list, window):
+    """Executa `fn` em paralelo mantendo a ordem de entrada dos resultados.
+
+    No máximo `window` tarefas ficam pendentes, limitando os DataFrames retidos em memória
+    enquanto o processo escritor consome os resultados na ordem dos arquivos.
+    """
+    args_iter = iter(args_list)
+    pending = deque(executor.submit(fn, *args) for args in islice(args_iter, window))
+    while pending:
+        result = pending.popleft().result()
+        next_args = next(args_iter, None)
+        if next_args is not None:
+            pending.append(executor.submit(fn, *next_args))
+        yield result
+
+
+def iter_file_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Gera blocos limpos de até `chunk_size` linhas, sem carregar o arquivo inteiro.
+
+    Todos os blocos saem com as mesmas colunas (definidas pelo layout), para que o CSV
+    processado possa ser gravado de forma incremental.
+    """
+    layout = get_layout(file_path)
+    initial_rows = 0
+    final_rows = 0
+    last_time = None
+    strict = True
+
+    while True:
+        try:
+            reader = read_with_layout(file_path, layout, chunksize=chunk_size, strict=strict)
+            while True:
+                with stage('parse'):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                initial_rows += len(chunk)
+                # No reinício tolerante, pula o que já foi entregue (logs são cronológicos)
+                chunk = rows_after(clean_dataframe(chunk), last_time)
+                if not chunk.empty:
+                    final_rows += len(chunk)
+                    last_time = chunk['time'].max()
+                    yield chunk
+            break
+        except (ValueError, TypeError):
+            if not strict:
+                raise
+            print("   -> Aviso: valores não numéricos encontrados; relendo com conversão tolerante.")
+            strict = False
+            initial_rows = 0
+
+    count('rows_read', initial_rows)
+    print(f"   -> Linhas lidas: {initial_rows}")
+    print(f"   -> Linhas após limpeza: {final_rows}")
+
+
+def archive_file(source_path, archive_dir, compress=ARCHIVE_GZIP):
+    """Move o log carregado para `archive_dir`, compactado com gzip (.gz) se `compress`.
+
+    O .gz é gravado em um arquivo temporário e renomeado; o original só é removido depois disso.
+    Retorna o caminho final.
+    """
+    destination = os.path.join(archive_dir, os.path.basename(source_path))
+    if not compress or source_path.endswith('.gz'):
+        shutil.move(source_path, destination)
+        return destination
+
+    destination += '.gz'
+    temp_path = destination + '.tmp'
+    with open(source_path, 'rb') as src, gzip.open(temp_path, 'wb', compresslevel=ARCHIVE_GZIP_LEVEL) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    shutil.copystat(source_path, temp_path)
+    os.replace(temp_path, destination)
+    os.remove(source_path)
+    return destination
+
+
+def list_logs(directory, compressed=False):
+    """Logs .csv de `directory` em ordem alfabética (com `compressed`, também os arquivados .csv.gz)."""
+    extensions = ('.csv', '.csv.gz') if compressed else ('.csv',)
+    return sorted(f for f in os.listdir(directory) if f.endswith(extensions))
+
+
+def rows_after(data, resume_after):
+    """Filtra as linhas posteriores a `resume_after` (None mantém todas)."""
+    if resume_after is None:
+        return data
+    return data[data['time'] > resume_after]
+
+
+def run_etl(chunk_size=None, jobs=1, profile_file=None, processed_format=PROCESSED_FORMAT, partition_by_day=False,
+            reingest=False):
+    """Executa o ETL de todos os CSVs de RAW_DIR em uma única transação.
+
+    Com `chunk_size`, cada arquivo é lido, limpo e inserido em blocos (streaming),
+    mantendo o uso de memória limitado independentemente do tamanho do arquivo.
+    Com `jobs` > 1, leitura e limpeza rodam em processos paralelos e o processo
+    principal insere os resultados no banco na ordem (alfabética) dos arquivos.
+    Tempos por etapa e contadores de cada arquivo são gravados em METRICS_PATH;
+    `profile_file` (nome de um arquivo de RAW_DIR) gera um perfil cProfile do seu processamento.
+    `processed_format` define a cópia em LOADED_PROCESSED_DIR: "csv" ou "parquet" (tipado e
+    comprimido; com `partition_by_day`, um diretório por dia).
+    Com `reingest`, reprocessa os logs já arquivados em LOADED_RAW_DIR (.csv ou .csv.gz, lidos
+    sem descompactar em disco) e os mantém onde estão; conteúdos já presentes no manifesto são pulados.
+    """
+    if chunk_size and jobs > 1:
+        raise ValueError("O modo streaming (chunk_size) não pode ser combinado com jobs > 1.")
+    if partition_by_day and processed_format != 'parquet':
+        raise ValueError("O particionamento por dia requer o formato parquet.")
+    if processed_format == 'parquet':
+        require_pyarrow()  # falha antes de iniciar a carga
+
     print("\n--- Iniciando Pipeline de Dados (Memória -> Banco -> Arquivo) ---")
 
-    if not os.path.exists(RAW_DIR):
-         print(f"Diretório {RAW_DIR} não encontrado.")
+    source_dir = LOADED_RAW_DIR if reingest else RAW_DIR
+    if not os.path.exists(source_dir):
+         print(f"Diretório {source_dir} não encontrado.")
          return
 
-    files_to_process = [f for f in os.listdir(RAW_DIR) if f.endswith('.csv')]
+    # Ordem determinística de carga
+    files_to_process = list_logs(source_dir, compressed=reingest)
 
     if not files_to_process:
-        print(f"\nNenhum arquivo .csv encontrado na pasta '{RAW_DIR}'.")
+        print(f"\nNenhum arquivo .csv encontrado na pasta '{source_dir}'.")
         return
 
     print(f"Encontrados {len(files_to_process)} arquivos para processar.")
     
     # Lista de ações para efetivar no final (File Moves)
-    file_moves = [] # (origem, destino)
+    file_moves = [] # (origem, nome)
+
+    # Intervalos inseridos, para recalcular só os buckets de rollup afetados
+    rollup_ranges = RollupRanges()
 
-    with Session() as session:
+    metrics = RunMetrics(('reingest-' if reingest else '') + ('jobs' if jobs > 1 else 'stream' if chunk_size else 'whole'))
+
+    # Modo paralelo: workers processam e gravam os CSVs; este processo é o único escritor do banco
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+
+    with executor, Session() as session:
         try:
+            # 0. Manifesto: arquivos já carregados são pulados sem leitura completa (apenas arquivados)
+            pending_files = [] # (nome, impressão digital)
+            seen_hashes = set()
             for file_name in files_to_process:
-                source_path = os.path.join(RAW_DIR, file_name)
-                loaded_raw_path = os.path.join(LOADED_RAW_DIR, file_name)
-                loaded_processed_path = os.path.join(LOADED_PROCESSED_DIR, file_name)
+                source_path = os.path.join(source_dir, file_name)
+                file_metrics = metrics.file(file_name, source_path)
+                with track(file_metrics), stage('fingerprint'):
+                    content_hash = file_fingerprint(source_path)
+                    previous = None if content_hash in seen_hashes else find_in_manifest(session, content_hash)
+                if content_hash in seen_hashes or previous is not None:
+                    origin = previous.file_name if previous is not None else "outro arquivo desta carga"
+                    print(f"\n--- Ignorando {file_name}: conteúdo já carregado ({origin}) ---")
+                    file_metrics.skipped = True
+                    if not reingest:
+                        file_moves.append((source_path, file_name))
+                    continue
+                seen_hashes.add(content_hash)
+                pending_files.append((file_name, content_hash))
+
+            if jobs > 1:
+                print(f"Processando com {jobs} processos paralelos.")
+                parsed_files = ordered_parallel_map(
+                    executor,
+                    parse_and_save,
+                    [
+                        (os.path.join(source_dir, f), processed_path(f, processed_format), processed_format, partition_by_day)
+                        for f, _ in pending_files
+                    ],
+                    window=2 * jobs
+                )
+
+            for file_name, content_hash in pending_files:
+                source_path = os.path.join(source_dir, file_name)
+                loaded_processed_path = processed_path(file_name, processed_format)
+                file_metrics = metrics.file(file_name)
                 
                 print(f"\n--- Processando: {file_name} ---")
-                
-                # 1. Processamento em Memória
-                df = process_file_to_df(source_path)
-                
-                # 2. Inserção no Banco (Transacional)
-                insert_dataframe(session, df)
-                print("   -> Dados inseridos na sessão do banco.")
-                
-                # 3. Salvar CSV Processado (Arquivo)
-                df.to_csv(loaded_processed_path, index=False)
-                print(f"   -> CSV processado salvo em: {loaded_processed_path}")
-                
-                # Adiciona à lista de movimentos para executar APÓS commit
-                file_moves.append((source_path, loaded_raw_path))
+
+                with track(file_metrics), profiled(file_name, file_name == profile_file):
+                    # Log já parcialmente carregado pelo modo follow: insere só o restante
+                    resume_after = None if reingest else pop_follow_state(session, file_name)
+                    if resume_after is not None:
+                        print(f"   -> Arquivo acompanhado pelo modo follow; inserindo apenas linhas após {resume_after}.")
+                    
+                    if jobs > 1:
+                        # 1 e 3 já executados no worker: resta a inserção no banco
+                        df, initial_rows, worker_metrics = next(parsed_files)
+                        file_metrics.merge(worker_metrics)
+                        print(f"   -> Linhas lidas: {initial_rows}")
+                        print(f"   -> Linhas após limpeza: {len(df)}")
+                        file_rows, time_min, time_max = len(df), df['time'].min(), df['time'].max()
+
+                        # 2. Inserção no Banco (Transacional)
+                        rows, duplicates, seconds = insert_dataframe(session, rows_after(df, resume_after))
+                        print(f"   -> Dados inseridos na sessão do banco ({format_throughput(rows, seconds)}).")
+                        print(f"   -> Linhas descartadas (horário já existente ou fora da retenção): {duplicates}")
+                        print(f"   -> Arquivo processado salvo em: {loaded_processed_path}")
+                    elif chunk_size:
+                        # 1-3. Streaming: lê, insere e grava o arquivo processado bloco a bloco
+                        rows, duplicates, seconds = 0, 0, 0.0
+                        file_rows, time_min, time_max = 0, None, None
+                        with ProcessedWriter(loaded_processed_path, processed_format, partition_by_day) as writer:
+                            for chunk in iter_file_chunks(source_path, chunk_size):
+                                chunk_rows, chunk_duplicates, chunk_seconds = insert_dataframe(session, rows_after(chunk, resume_after))
+                                rows += chunk_rows
+                                duplicates += chunk_duplicates
+                                seconds += chunk_seconds
+                                file_rows += len(chunk)
+                                chunk_min, chunk_max = chunk['time'].min(), chunk['time'].max()
+                                time_min = chunk_min if time_min is None else min(time_min, chunk_min)
+                                time_max = chunk_max if time_max is None else max(time_max, chunk_max)
+                                with stage('write'):
+                                    writer.write(chunk)
+                        print(f"   -> Dados inseridos na sessão do banco ({format_throughput(rows, seconds)}).")
+                        print(f"   -> Linhas descartadas (horário já existente ou fora da retenção): {duplicates}")
+                        print(f"   -> Arquivo processado salvo em: {loaded_processed_path}")
+                    else:
+                        # 1. Processamento em Memória
+                        df = process_file_to_df(source_path)
+                        file_rows, time_min, time_max = len(df), df['time'].min(), df['time'].max()
+
+                        # 2. Inserção no Banco (Transacional)
+                        rows, duplicates, seconds = insert_dataframe(session, rows_after(df, resume_after))
+                        print(f"   -> Dados inseridos na sessão do banco ({format_throughput(rows, seconds)}).")
+                        print(f"   -> Linhas descartadas (horário já existente ou fora da retenção): {duplicates}")
+
+                        # 3. Salvar Arquivo Processado (CSV ou Parquet)
+                        with stage('write'), ProcessedWriter(loaded_processed_path, processed_format, partition_by_day) as writer:
+                            writer.write(df)
+                        print(f"   -> Arquivo processado salvo em: {loaded_processed_path}")
+
+                    file_metrics.rows_clean = file_rows
+                    file_metrics.rows_inserted = rows
+                    file_metrics.duplicates = duplicates
+                    if rows:
+                        rollup_ranges.add(time_min, time_max)
+
+                    # Registra no manifesto (mesma transação dos dados)
+                    record_in_manifest(session, content_hash, source_path, file_rows, time_min, time_max)
+
+                # Adiciona à lista de movimentos para executar APÓS commit (reingestão mantém os arquivos)
+                if not reingest:
+                    file_moves.append((source_path, file_name))
+
+            # Rollups (minuto/hora/dia) dos intervalos inseridos, na mesma transação
+            with metrics.run_stage('rollups'):
+                rollup_ranges.refresh(session, floor=pruned_before(session))
 
             # Commit da transação
-            session.commit()
+            with metrics.run_stage('commit'):
+                session.commit()
             print("\n--- Transação concluída com sucesso no Banco de Dados! ---")
             
-            # 4. Mover arquivos originais (apenas se DB commitou)
-            for src, dst in file_moves:
-                shutil.move(src, dst)
+            # 4. Arquivar arquivos originais, compactados (apenas se DB commitou)
+            for src, file_name in file_moves:
+                with track(metrics.file(file_name)), stage('move'):
+                    dst = archive_file(src, LOADED_RAW_DIR)
                 print(f"Arquivo original movido para: {dst}")
 
         except Exception as e:
             session.rollback()
+            if jobs > 1:
+                executor.shutdown(cancel_futures=True)
             print(f"\n!!! ERRO FATAL no Pipeline: {e}")
             print("!!! Rollback executado. Nenhuma alteração no banco foi salva.")
             # Arquivos não são movidos, CSVs processados podem ter sido criados mas serão sobrescritos na próxima ou podem ser limpos manualmente se crítico.
@@ -146,4 +364,10 @@ def run_etl():
             # Idealmente limparíamos os arquivos criados nessa run em caso de erro, mas para simplicidade vamos manter assim.
             raise e
 
+    # 5. Meses encerrados saem do banco principal para as partições mensais
+    with metrics.run_stage('seal'):
+        seal_closed_months()
+
+    metrics.print_summary()
+    print(f"Métricas gravadas em: {metrics.write()}")
     print("\n--- Ciclo ETL finalizado! ---")
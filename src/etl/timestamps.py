@@ -0,0 +1,124 @@
+# Conversão rápida dos horários do Core Temp ("%H:%M:%S %m/%d/%y", largura fixa de 17 caracteres).
+# Os campos são extraídos como arrays inteiros do NumPy; a parte de data (poucos valores distintos
+# por arquivo) é resolvida uma vez e cacheada, gerando segundos desde a época diretamente.
+
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+
+TIME_WIDTH = 17  # "HH:MM:SS MM/DD/YY"
+EPOCH_DATE = date(1970, 1, 1)
+NAT_SECONDS = np.iinfo(np.int64).min
+
+# Cache de datas: chave YYMMDD -> dias desde 1970-01-01 (None para datas inválidas)
+_date_cache = {}
+
+
+def _days_since_epoch(key):
+    """Resolve a chave YYMMDD em dias desde a época, com a regra do %y (69-99 -> 19xx)."""
+    if key not in _date_cache:
+        yy, mmdd = divmod(key, 10000)
+        mm, dd = divmod(mmdd, 100)
+        year = 1900 + yy if yy >= 69 else 2000 + yy
+        try:
+            _date_cache[key] = (date(year, mm, dd) - EPOCH_DATE).days
+        except ValueError:
+            _date_cache[key] = None
+    return _date_cache[key]
+
+
+def parse_core_temp_times(values):
+    """Converte textos "HH:MM:SS MM/DD/YY" em segundos desde a época (int64).
+
+    Valores fora do formato, com campos fora da faixa ou datas inexistentes resultam em NAT_SECONDS,
+    como o errors="coerce" do pd.to_datetime.
+    """
+    raw = np.asarray(values, dtype=object)
+    try:
+        # NaN vira b'nan' (inválido); textos longos são truncados e falham na checagem de tamanho
+        fixed = raw.astype(f'S{TIME_WIDTH + 1}')
+    except UnicodeEncodeError:
+        # Linhas com caracteres não ASCII nunca são horários válidos
+        fixed = np.array([v if isinstance(v, str) and v.isascii() else '' for v in raw], dtype=f'S{TIME_WIDTH + 1}')
+    n = len(fixed)
+    chars = fixed.view(np.uint8).reshape(n, TIME_WIDTH + 1)
+
+    # Exatamente 17 caracteres, separadores nas posições fixas e dígitos no restante
+    valid = chars[:, TIME_WIDTH] == 0
+    for col, sep in ((2, ':'), (5, ':'), (8, ' '), (11, '/'), (14, '/')):
+        valid &= chars[:, col] == ord(sep)
+    digits = chars[:, [0, 1, 3, 4, 6, 7, 9, 10, 12, 13, 15, 16]].astype(np.int32) - ord('0')
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    hour = digits[:, 0] * 10 + digits[:, 1]
+    minute = digits[:, 2] * 10 + digits[:, 3]
+    second = digits[:, 4] * 10 + digits[:, 5]
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    # Chave YYMMDD; poucas datas distintas, resolvidas uma vez cada via tabela de consulta
+    date_key = np.where(valid, digits[:, 10] * 100000 + digits[:, 11] * 10000 + digits[:, 6] * 1000
+                        + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9], 0)
+    present = np.flatnonzero(np.bincount(date_key[valid], minlength=1))
+    lookup = np.full(1_000_000, NAT_SECONDS, dtype=np.int64)
+    for key in present:
+        days_value = _days_since_epoch(int(key))
+        if days_value is not None:
+            lookup[key] = days_value
+    days = lookup[date_key]
+    valid &= days != NAT_SECONDS
+
+    seconds = days * 86400 + (hour * 3600 + minute * 60 + second)
+    return np.where(valid, seconds, NAT_SECONDS)
+
+
+def seconds_to_datetime(seconds):
+    """Segundos desde a época (NAT_SECONDS = ausente) -> array datetime64[ns]."""
+    return np.asarray(seconds, dtype=np.int64).view('datetime64[s]').astype('datetime64[ns]')
+
+
+def core_temp_seconds(values):
+    """Segundos desde a época para os horários do Core Temp, com o mesmo resultado do pd.to_datetime.
+
+    Valores recusados pelo caminho rápido (largura fixa) são repassados ao pd.to_datetime, que aceita
+    variações como horas sem zero à esquerda; normalmente são só as poucas linhas inválidas do arquivo.
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    seconds = parse_core_temp_times(values)
+    rejected = seconds == NAT_SECONDS
+    if rejected.any():
+        retry = pd.to_datetime(values[rejected], format="%H:%M:%S %m/%d/%y", errors="coerce")
+        retry_seconds = retry.to_numpy(dtype='datetime64[s]').view(np.int64)
+        seconds[rejected] = np.where(retry.isna().to_numpy(), NAT_SECONDS, retry_seconds)
+    return seconds
+
+
+def to_core_temp_datetime(values):
+    """Equivalente rápido de pd.to_datetime(values, format="%H:%M:%S %m/%d/%y", errors="coerce")."""
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(seconds_to_datetime(core_temp_seconds(values)), index=index, name=getattr(values, 'name', None))
+
+
+def benchmark(n_rows=10_000_000):
+    """Compara parse_core_temp_times com pd.to_datetime em `n_rows` horários sintéticos (10 s entre amostras)."""
+    start = pd.Timestamp('2024-01-01')
+    times = (start + pd.to_timedelta(np.arange(n_rows) * 10, unit='s')).strftime('%H:%M:%S %m/%d/%y')
+    values = pd.Series(np.asarray(times, dtype=object))
+
+    t0 = time.perf_counter()
+    expected = pd.to_datetime(values, format="%H:%M:%S %m/%d/%y", errors="coerce")
+    pandas_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = to_core_temp_datetime(values)
+    fast_seconds = time.perf_counter() - t0
+
+    assert (result.to_numpy() == expected.to_numpy()).all()
+    print(f"{n_rows} linhas | pd.to_datetime: {pandas_seconds:.2f}s | "
+          f"parser rápido: {fast_seconds:.2f}s | {pandas_seconds / fast_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.etl.timestamps [linhas]
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
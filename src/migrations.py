@@ -0,0 +1,268 @@
+# Migrações versionadas do esquema do banco (substitui a verificação por inspect a cada inicialização).
+# A versão aplicada fica na tabela schema_version; na inicialização basta uma consulta para saber
+# se há migrações pendentes. Bancos novos são criados direto na versão mais recente.
+
+import os
+from datetime import datetime
+from sqlalchemy import Table, Column, MetaData, text
+from config import MIGRATION_BATCH_ROWS, PARTITION_DIR
+from src.database import engine
+from src.models import (
+    TABLE_NAME, SCHEMA_VERSION_TABLE_NAME, ROLLUP_TABLE_NAMES, ROLLUP_DAY_TEMP_TABLE_NAME,
+    PARTITION_CATALOG_TABLE_NAME, metadata, raw_data_table, rollup_tables, rollup_day_temp_table,
+    follow_state_table, ingest_manifest_table, schema_version_table, partition_catalog_table, retention_table,
+    calendar_table, data_version_table
+)
+from src.rollups import rebuild_rollups, refresh_calendar, refresh_day_times
+
+TIME_INDEX_NAME = f"ix_{TABLE_NAME}_time"
+
+
+def table_exists(conn, table_name):
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table_name}
+    ).first() is not None
+
+
+def begin_transaction(conn):
+    """Abre a transação explicitamente: o sqlite3 só a inicia sozinho antes de DML, não de DDL."""
+    if not conn.connection.driver_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
+def incremental_vacuum(conn):
+    """Devolve ao disco as páginas livres do banco principal (auto_vacuum = INCREMENTAL).
+
+    Via executescript, que executa o PRAGMA até o fim: com execute, cada chamada libera uma única página.
+    """
+    conn.connection.driver_connection.executescript("PRAGMA incremental_vacuum;")
+
+
+def create_time_index(conn):
+    """Índice único em raw_data.time do layout com rowid (versões 1 e 2 do esquema)."""
+    conn.execute(text(f"CREATE UNIQUE INDEX {TIME_INDEX_NAME} ON {TABLE_NAME} (time)"))
+
+
+def migrate_legacy_baseline(conn):
+    """v1: bancos criados antes das migrações: índice único em 'time' (sem duplicados) e tabelas auxiliares."""
+    begin_transaction(conn)
+    indexes = conn.execute(text(f"PRAGMA index_list({TABLE_NAME})")).fetchall()
+    time_indexes = [
+        (row[1], bool(row[2])) for row in indexes
+        if [c[2] for c in conn.execute(text(f'PRAGMA index_info("{row[1]}")')).fetchall()] == ['time']
+    ]
+
+    if not any(unique for _, unique in time_indexes):
+        print(f"Índice único na coluna 'time' não encontrado. Criando índice '{TIME_INDEX_NAME}'...")
+        # Remove amostras duplicadas (logs sobrepostos), mantendo a primeira inserida
+        result = conn.execute(text(f"""
+            DELETE FROM {TABLE_NAME}
+            WHERE rowid NOT IN (SELECT MIN(rowid) FROM {TABLE_NAME} GROUP BY time)
+            """))
+        if result.rowcount:
+            print(f"{result.rowcount} linhas duplicadas removidas de '{TABLE_NAME}'.")
+        for name, _ in time_indexes:
+            conn.execute(text(f'DROP INDEX "{name}"'))
+        create_time_index(conn)
+
+    follow_state_table.create(conn, checkfirst=True)
+    ingest_manifest_table.create(conn, checkfirst=True)
+
+
+def copy_raw_data(conn, new_table_name, time_expression, key_expression, start_key):
+    """Copia raw_data para `new_table_name` em lotes de MIGRATION_BATCH_ROWS, em ordem de horário.
+
+    Paginação por chave (time > último horário copiado) com commit a cada lote: uma cópia
+    interrompida continua de onde parou. `time_expression` converte o horário da origem para a
+    tabela nova e `key_expression` converte MAX(time) da tabela nova de volta à chave da origem.
+    """
+    columns = [c.name for c in raw_data_table.columns if c.name != 'time']
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE_NAME}")).scalar()
+    copied = conn.execute(text(f"SELECT COUNT(*) FROM {new_table_name}")).scalar()
+
+    while True:
+        last_key = conn.execute(text(f"SELECT {key_expression} FROM {new_table_name}")).scalar()
+        result = conn.execute(text(f"""
+            INSERT INTO {new_table_name} (time, {', '.join(columns)})
+            SELECT {time_expression}, {', '.join(columns)}
+            FROM {TABLE_NAME}
+            WHERE time > :last_key
+            ORDER BY time
+            LIMIT :batch
+            """), {"last_key": start_key if last_key is None else last_key, "batch": MIGRATION_BATCH_ROWS})
+        if result.rowcount <= 0:
+            break
+        copied += result.rowcount
+        conn.commit()
+        print(f"   -> {copied}/{total} linhas copiadas.")
+
+
+def migrate_epoch_time(conn):
+    """v2: 'time' de TEXT ('YYYY-MM-DD HH:MM:SS') para INTEGER (segundos desde a época, horário local).
+
+    As linhas vão para uma tabela nova (cópia em lotes, retomável) e os rollups são recriados
+    com o novo tipo e recalculados no final.
+    A paginação compara o texto 'YYYY-MM-DD HH:MM:SS', formato gravado por todas as versões do ETL.
+    """
+    new_table_name = f"{TABLE_NAME}_epoch"
+    # Mesmas colunas, sem índices (nomes de índice são globais no SQLite; o índice é criado após a troca)
+    new_table = Table(
+        new_table_name, MetaData(),
+        *[Column(c.name, c.type) for c in raw_data_table.columns]
+    )
+    begin_transaction(conn)
+    new_table.create(conn, checkfirst=True)
+    conn.commit()
+
+    copy_raw_data(
+        conn, new_table_name,
+        time_expression="CAST(strftime('%s', time) AS INTEGER)",
+        key_expression="strftime('%Y-%m-%d %H:%M:%S', MAX(time), 'unixepoch')",
+        start_key=''
+    )
+
+    # Troca das tabelas e rollups com 'time' inteiro, em uma única transação
+    begin_transaction(conn)
+    conn.execute(text(f"DROP TABLE {TABLE_NAME}"))
+    conn.execute(text(f"ALTER TABLE {new_table_name} RENAME TO {TABLE_NAME}"))
+    create_time_index(conn)
+    for table_name in list(ROLLUP_TABLE_NAMES.values()) + [ROLLUP_DAY_TEMP_TABLE_NAME]:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+    for table in list(rollup_tables.values()) + [rollup_day_temp_table]:
+        table.create(conn)
+    rebuild_rollups(conn)
+
+
+def migrate_clustered_time(conn):
+    """v3: 'time' como INTEGER PRIMARY KEY de raw_data (alias do rowid).
+
+    As amostras passam a ficar ordenadas por horário nas páginas da própria tabela: consultas
+    por intervalo leem páginas contíguas, sem passar pelo índice em 'time' e sem a busca por
+    rowid de cada linha. O índice, que duplicava todos os horários, deixa de existir.
+    """
+    new_table = raw_data_table.to_metadata(MetaData(), name=f"{TABLE_NAME}_clustered")
+    begin_transaction(conn)
+    new_table.create(conn, checkfirst=True)
+    conn.commit()
+
+    copy_raw_data(conn, new_table.name, time_expression="time", key_expression="MAX(time)", start_key=-2**63)
+
+    # O índice em 'time' é removido junto com a tabela antiga
+    begin_transaction(conn)
+    conn.execute(text(f"DROP TABLE {TABLE_NAME}"))
+    conn.execute(text(f"ALTER TABLE {new_table.name} RENAME TO {TABLE_NAME}"))
+
+
+def migrate_partition_catalog(conn):
+    """v4: catálogo das partições mensais (os meses continuam no banco principal até serem selados)."""
+    begin_transaction(conn)
+    partition_catalog_table.create(conn, checkfirst=True)
+
+
+def migrate_retention(conn):
+    """v5: marcas de retenção (horário antes do qual cada tabela já foi podada)."""
+    begin_transaction(conn)
+    retention_table.create(conn, checkfirst=True)
+
+
+def add_day_time_columns(conn, schema="main"):
+    """Acrescenta time_min/time_max a rollup_day de `schema` (bancos e partições anteriores à v6)."""
+    day = ROLLUP_TABLE_NAMES['day']
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA {schema}.table_info({day})"))}
+    for column in ('time_min', 'time_max'):
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {schema}.{day} ADD COLUMN {column} INTEGER"))
+
+
+def migrate_calendar(conn):
+    """v6: calendário de dias com dados, preenchido a partir dos rollups das partições e do banco principal.
+
+    Antes, rollup_day de cada banco ganha o primeiro e o último horário de raw_data por dia.
+    Cada partição é anexada fora da transação (o SQLite não permite ATTACH dentro dela) e grava os
+    dias do seu mês; o banco principal entra por último, com as amostras recebidas após a selagem.
+    """
+    begin_transaction(conn)
+    calendar_table.create(conn, checkfirst=True)
+    add_day_time_columns(conn)
+    refresh_day_times(conn)
+    conn.commit()
+    file_names = [row[0] for row in conn.execute(text(f"SELECT file_name FROM {PARTITION_CATALOG_TABLE_NAME} ORDER BY month"))]
+    for file_name in file_names:
+        conn.execute(text("ATTACH DATABASE :path AS sealed"), {"path": os.path.join(PARTITION_DIR, file_name)})
+        try:
+            begin_transaction(conn)
+            add_day_time_columns(conn, "sealed")
+            refresh_day_times(conn, schema="sealed")
+            refresh_calendar(conn, schema="sealed", replace=True)
+            conn.commit()
+        finally:
+            conn.execute(text("DETACH DATABASE sealed"))
+    begin_transaction(conn)
+    refresh_calendar(conn)
+
+
+def migrate_data_version(conn):
+    """v7: geração dos dados (chave do cache do dashboard), criada na primeira carga."""
+    begin_transaction(conn)
+    data_version_table.create(conn, checkfirst=True)
+
+
+# (versão, descrição, função) em ordem; novas migrações entram no final
+MIGRATIONS = [
+    (1, "Índice único em time e tabelas auxiliares (bancos anteriores às migrações)", migrate_legacy_baseline),
+    (2, "Horário como INTEGER (epoch) e rollups recalculados", migrate_epoch_time),
+    (3, "raw_data ordenada por horário (time como chave primária)", migrate_clustered_time),
+    (4, "Catálogo de partições mensais", migrate_partition_catalog),
+    (5, "Marcas de retenção", migrate_retention),
+    (6, "Calendário de dias com dados", migrate_calendar),
+    (7, "Geração dos dados (cache do dashboard)", migrate_data_version),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def record_version(conn, version, description):
+    conn.execute(
+        schema_version_table.insert().values(
+            version=version, description=description, applied_at=datetime.now().replace(microsecond=0)
+        )
+    )
+
+
+def current_version(conn):
+    """Versão aplicada do esquema: 0 para bancos anteriores às migrações, None para banco vazio."""
+    if table_exists(conn, SCHEMA_VERSION_TABLE_NAME):
+        return conn.execute(text(f"SELECT MAX(version) FROM {SCHEMA_VERSION_TABLE_NAME}")).scalar() or 0
+    return 0 if table_exists(conn, TABLE_NAME) else None
+
+
+def migrate():
+    """Garante o banco na versão mais recente do esquema, aplicando as migrações pendentes."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+        if version is None:
+            print(f"Tabela '{TABLE_NAME}' não encontrada. Criando estrutura padrão...")
+            # auto_vacuum = INCREMENTAL já foi aplicado na abertura do arquivo (INGEST_PRAGMAS, antes do WAL):
+            # o espaço liberado pela retenção e pela selagem volta ao disco com incremental_vacuum
+            begin_transaction(conn)
+            metadata.create_all(conn)
+            for number, description, _ in MIGRATIONS:
+                record_version(conn, number, description)
+            conn.commit()
+            print(f"Banco criado na versão {LATEST_VERSION} do esquema.")
+            return
+
+        if version >= LATEST_VERSION:
+            return
+
+        begin_transaction(conn)
+        schema_version_table.create(conn, checkfirst=True)
+        conn.commit()
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            print(f"Aplicando migração {number}: {description}...")
+            apply(conn)
+            record_version(conn, number, description)
+            conn.commit()
+            print(f"Migração {number} concluída.")
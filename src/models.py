@@ -1,87 +1,200 @@
-from sqlalchemy import Table, Column, Integer, Float, DateTime, MetaData, inspect, Index
-from src.database import engine
+from sqlalchemy import Table, Column, Integer, Float, DateTime, String, MetaData, Index
 
 metadata = MetaData()
 
 TABLE_NAME = "raw_data"
 
-# Definição da tabela
+# Definição da tabela (info['dtype']: tipo compacto usado em memória durante o ETL).
+# 'time' é o horário local do Core Temp em segundos desde 1970-01-01 (epoch sem fuso: dias de 86400 s)
+# e a chave primária inteira da tabela (alias do rowid): as amostras ficam ordenadas por horário nas
+# próprias páginas da tabela, sem índice secundário.
 raw_data_table = Table(
     TABLE_NAME,
     metadata,
-    Column('time', DateTime, index=True),
-    Column('core_temp_0', Integer),
-    Column('low_temp_0', Integer),
-    Column('high_temp_0', Integer),
-    Column('core_load_0', Float),
-    Column('core_speed_0', Float),
-
-    Column('core_temp_1', Integer),
-    Column('low_temp_1', Integer),
-    Column('high_temp_1', Integer),
-    Column('core_load_1', Float),
-    Column('core_speed_1', Float),
-
-    Column('core_temp_2', Integer),
-    Column('low_temp_2', Integer),
-    Column('high_temp_2', Integer),
-    Column('core_load_2', Float),
-    Column('core_speed_2', Float),
-
-    Column('core_temp_3', Integer),
-    Column('low_temp_3', Integer),
-    Column('high_temp_3', Integer),
-    Column('core_load_3', Float),
-    Column('core_speed_3', Float),
-
-    Column('core_temp_4', Integer),
-    Column('low_temp_4', Integer),
-    Column('high_temp_4', Integer),
-    Column('core_load_4', Float),
-    Column('core_speed_4', Float),
-
-    Column('core_temp_5', Integer),
-    Column('low_temp_5', Integer),
-    Column('high_temp_5', Integer),
-    Column('core_load_5', Float),
-    Column('core_speed_5', Float),
-
-    Column('cpu_power', Float)
+    Column('time', Integer, primary_key=True, autoincrement=False),
+    Column('core_temp_0', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_0', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_0', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_0', Float, info={'dtype': 'float32'}),
+    Column('core_speed_0', Float, info={'dtype': 'float32'}),
+
+    Column('core_temp_1', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_1', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_1', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_1', Float, info={'dtype': 'float32'}),
+    Column('core_speed_1', Float, info={'dtype': 'float32'}),
+
+    Column('core_temp_2', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_2', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_2', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_2', Float, info={'dtype': 'float32'}),
+    Column('core_speed_2', Float, info={'dtype': 'float32'}),
+
+    Column('core_temp_3', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_3', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_3', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_3', Float, info={'dtype': 'float32'}),
+    Column('core_speed_3', Float, info={'dtype': 'float32'}),
+
+    Column('core_temp_4', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_4', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_4', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_4', Float, info={'dtype': 'float32'}),
+    Column('core_speed_4', Float, info={'dtype': 'float32'}),
+
+    Column('core_temp_5', Integer, info={'dtype': 'Int16'}),
+    Column('low_temp_5', Integer, info={'dtype': 'Int16'}),
+    Column('high_temp_5', Integer, info={'dtype': 'Int16'}),
+    Column('core_load_5', Float, info={'dtype': 'float32'}),
+    Column('core_speed_5', Float, info={'dtype': 'float32'}),
+
+    Column('cpu_power', Float, info={'dtype': 'float32'})
+)
+
+# Dtypes compactos usados pelo ETL em memória (Column.info['dtype']): temperaturas Int16 anulável,
+# cargas/velocidades/energia float32 (NaN representa lacunas)
+ETL_DTYPES = {col.name: col.info['dtype'] for col in raw_data_table.columns if 'dtype' in col.info}
+
+# Estado do modo follow: posição (bytes) já ingerida de cada log em RAW_DIR
+FOLLOW_STATE_TABLE_NAME = "follow_state"
+
+follow_state_table = Table(
+    FOLLOW_STATE_TABLE_NAME,
+    metadata,
+    Column('file_name', String, primary_key=True),
+    Column('byte_offset', Integer, nullable=False),
+    Column('last_time', DateTime),
+    Column('updated_at', DateTime)
+)
+
+# Manifesto de ingestão: um registro por arquivo carregado, identificado pela impressão digital do conteúdo
+MANIFEST_TABLE_NAME = "ingest_manifest"
+
+ingest_manifest_table = Table(
+    MANIFEST_TABLE_NAME,
+    metadata,
+    Column('content_hash', String, primary_key=True),
+    Column('file_name', String, nullable=False),
+    Column('size_bytes', Integer, nullable=False),
+    Column('mtime', DateTime),
+    Column('rows_loaded', Integer),
+    Column('time_min', DateTime),
+    Column('time_max', DateTime),
+    Column('loaded_at', DateTime)
+)
+
+# Rollups (agregados por minuto, hora e dia): por bucket, quantidade de amostras e, para cada
+# métrica/núcleo, contagem de valores, soma, mínimo e máximo. A coluna 'time' é o início do bucket (epoch).
+# O rollup por dia guarda também o primeiro e o último horário de raw_data no dia (base do calendário).
+ROLLUP_METRICS = [f"{metric}_{core}" for core in range(6) for metric in ('core_temp', 'core_load', 'core_speed')] + ['cpu_power']
+ROLLUP_TABLE_NAMES = {"minute": "rollup_minute", "hour": "rollup_hour", "day": "rollup_day"}
+
+
+def rollup_columns(metrics):
+    """Colunas de agregado (<métrica>_count/_sum/_min/_max) para as métricas informadas."""
+    columns = []
+    for metric in metrics:
+        columns += [
+            Column(f'{metric}_count', Integer),
+            Column(f'{metric}_sum', Float),
+            Column(f'{metric}_min', Float),
+            Column(f'{metric}_max', Float),
+        ]
+    return columns
+
+
+rollup_tables = {
+    level: Table(
+        table_name,
+        metadata,
+        Column('time', Integer, primary_key=True, autoincrement=False),
+        Column('samples', Integer, nullable=False),
+        *rollup_columns(ROLLUP_METRICS),
+        # No final da tabela, onde o ALTER TABLE da migração v6 as coloca (cópias com SELECT *)
+        *([Column('time_min', Integer), Column('time_max', Integer)] if level == "day" else [])
+    )
+    for level, table_name in ROLLUP_TABLE_NAMES.items()
+}
+
+# Rollup diário por temperatura do núcleo 0 (relações temperatura x velocidade/energia e faixas)
+ROLLUP_DAY_TEMP_TABLE_NAME = "rollup_day_temp"
+ROLLUP_DAY_TEMP_METRICS = ['core_speed_0', 'cpu_power']
+
+rollup_day_temp_table = Table(
+    ROLLUP_DAY_TEMP_TABLE_NAME,
+    metadata,
+    Column('time', Integer, nullable=False),
+    Column('core_temp_0', Integer),  # NULL agrupa as amostras sem temperatura, como o GROUP BY em raw_data
+    Column('samples', Integer, nullable=False),
+    *rollup_columns(ROLLUP_DAY_TEMP_METRICS),
+    Index('ix_rollup_day_temp_time', 'time', 'core_temp_0')
+)
+
+# Tabelas com dados por horário: as de meses encerrados são movidas para partições mensais (src/partitions.py)
+PARTITIONED_TABLES = [raw_data_table, *rollup_tables.values(), rollup_day_temp_table]
+
+# Catálogo das partições mensais: um registro por mês movido do banco principal para seu arquivo
+PARTITION_CATALOG_TABLE_NAME = "partitions"
+
+partition_catalog_table = Table(
+    PARTITION_CATALOG_TABLE_NAME,
+    metadata,
+    Column('month', String, primary_key=True),  # 'YYYY-MM'
+    Column('file_name', String, nullable=False),
+    Column('samples', Integer, nullable=False),
+    Column('time_min', Integer),
+    Column('time_max', Integer),
+    Column('sealed_at', DateTime)
+)
+
+# Retenção: por tabela, horário (epoch, início de dia) antes do qual as linhas já foram descartadas
+RETENTION_TABLE_NAME = "retention"
+
+retention_table = Table(
+    RETENTION_TABLE_NAME,
+    metadata,
+    Column('table_name', String, primary_key=True),
+    Column('pruned_before', Integer, nullable=False),
+    Column('applied_at', DateTime)
 )
 
-def ensure_sqlite_database_and_table():
-    """Garante que a tabela e índices existam no banco de dados."""
-    insp = inspect(engine)
-
-    if not insp.has_table(TABLE_NAME):
-        print(f"Tabela '{TABLE_NAME}' não encontrada. Criando estrutura padrão...")
-        metadata.create_all(engine)
-        print(f"Tabela '{TABLE_NAME}' criada com sucesso.")
-    
-    # Verifica e cria índice se não existir (para bancos já existentes)
-    insp = inspect(engine) # Recarrega inspeção
-    indexes = insp.get_indexes(TABLE_NAME)
-    
-    # Nome padrão que usaremos
-    target_index_name = f"ix_{TABLE_NAME}_time"
-    
-    # Verifica se existe algum índice na coluna 'time'
-    has_time_index = False
-    for idx in indexes:
-        if 'time' in idx.get('column_names', []):
-            has_time_index = True
-            break
-
-    if not has_time_index:
-        print(f"Índice na coluna 'time' não encontrado. Criando índice '{target_index_name}'...")
-        # Define a tabela para manipulação do índice (autoload já foi feito via Table definition, 
-        # mas aqui usamos a definição explícita acima)
-        index = Index(target_index_name, raw_data_table.c.time)
-        try:
-            index.create(engine)
-            print(f"Índice '{target_index_name}' criado com sucesso.")
-        except Exception as e:
-            print(f"Aviso: Não foi possível criar o índice: {e}")
-    else:
-        # print("Índice na coluna 'time' já existe.")
-        pass
+# Calendário: um registro por dia com amostras, derivado dos rollups e mantido no banco principal
+# (não vai para as partições). Atende os filtros do dashboard (anos/meses/dias disponíveis e filtros
+# só por mês/dia) sem ler os rollups nem anexar partições.
+CALENDAR_TABLE_NAME = "calendar_days"
+
+calendar_table = Table(
+    CALENDAR_TABLE_NAME,
+    metadata,
+    Column('time', Integer, primary_key=True, autoincrement=False),  # início do dia (epoch)
+    Column('year', Integer, nullable=False),
+    Column('month', Integer, nullable=False),
+    Column('day', Integer, nullable=False),
+    Column('samples', Integer, nullable=False),
+    # Primeira e última amostra do dia (de rollup_day, calculadas sobre raw_data)
+    Column('time_min', Integer),
+    Column('time_max', Integer)
+)
+
+# Geração dos dados: incrementada a cada escrita que muda o que o dashboard lê (carga, follow,
+# selagem e recálculo dos rollups). Faz parte da chave do cache do dashboard (src/ui/queries.py)
+DATA_VERSION_TABLE_NAME = "data_version"
+
+data_version_table = Table(
+    DATA_VERSION_TABLE_NAME,
+    metadata,
+    Column('id', Integer, primary_key=True, autoincrement=False),  # linha única (id = 1)
+    Column('generation', Integer, nullable=False),
+    Column('updated_at', DateTime)
+)
+
+# Versão do esquema: uma linha por migração aplicada (ver src/migrations.py)
+SCHEMA_VERSION_TABLE_NAME = "schema_version"
+
+schema_version_table = Table(
+    SCHEMA_VERSION_TABLE_NAME,
+    metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('description', String),
+    Column('applied_at', DateTime)
+)
@@ -0,0 +1,274 @@
+# Partições mensais: meses encerrados saem do banco principal (telemetria.db) para um arquivo
+# por mês em PARTITION_DIR, com raw_data e rollups do mês. O ETL grava sempre no banco principal;
+# as partições só são regravadas inteiras ao selar um mês (imutáveis entre uma selagem e outra)
+# e as consultas anexam (ATTACH) apenas as que intersectam o filtro.
+
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import MetaData, create_engine, text
+from config import DB_PATH, PARTITION_DIR, PARTITION_SEAL_AFTER_DAYS
+from src.database import engine
+from src.migrations import begin_transaction, incremental_vacuum
+from src.models import (
+    TABLE_NAME, ROLLUP_TABLE_NAMES, PARTITION_CATALOG_TABLE_NAME, PARTITIONED_TABLES, raw_data_table
+)
+from src.rollups import bump_data_generation, refresh_calendar, refresh_rollups, to_epoch
+
+# Esquema de cada arquivo mensal: as mesmas tabelas do banco principal, com os mesmos nomes
+partition_metadata = MetaData()
+for _table in PARTITIONED_TABLES:
+    _table.to_metadata(partition_metadata)
+
+# Quantidade máxima de bancos anexados a uma conexão (SQLITE_MAX_ATTACHED, 10 por padrão)
+with closing(sqlite3.connect(":memory:")) as _conn:
+    ATTACH_LIMIT = _conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+
+def month_bounds(month):
+    """'YYYY-MM' -> (início, fim) do mês em epoch."""
+    start = pd.Timestamp(f"{month}-01")
+    return to_epoch(start), to_epoch(start + pd.offsets.MonthBegin(1))
+
+
+def partition_path(month):
+    return os.path.join(PARTITION_DIR, f"telemetria_{month}.db")
+
+
+def sealed_months(conn):
+    """Meses já movidos para partições, em ordem."""
+    return [row[0] for row in conn.execute(text(f"SELECT month FROM {PARTITION_CATALOG_TABLE_NAME} ORDER BY month"))]
+
+
+def sealed_times(conn, time_min, time_max):
+    """Horários (epoch) entre time_min e time_max já gravados em raw_data das partições.
+
+    Usa o catálogo para abrir só as partições cujo intervalo intersecta o pedido; cada arquivo é lido
+    por uma conexão própria, já que ATTACH não é permitido dentro da transação de carga.
+    """
+    rows = conn.execute(text(f"""
+        SELECT month FROM {PARTITION_CATALOG_TABLE_NAME}
+        WHERE time_min <= :time_max AND time_max >= :time_min
+        ORDER BY month
+        """), {"time_min": int(time_min), "time_max": int(time_max)}).all()
+    times = []
+    for (month,) in rows:
+        path = partition_path(month)
+        if not os.path.exists(path):
+            continue
+        with closing(sqlite3.connect(path)) as part_conn:
+            times += [row[0] for row in part_conn.execute(
+                f"SELECT time FROM {TABLE_NAME} WHERE time BETWEEN ? AND ?", (int(time_min), int(time_max))
+            )]
+    return times
+
+
+def months_to_seal(conn, now=None):
+    """Meses com dados no banco principal encerrados há mais de PARTITION_SEAL_AFTER_DAYS dias."""
+    limit = (now or datetime.now()) - timedelta(days=PARTITION_SEAL_AFTER_DAYS)
+    cutoff = to_epoch(datetime(limit.year, limit.month, 1))
+    return [row[0] for row in conn.execute(text(f"""
+        SELECT DISTINCT strftime('%Y-%m', time, 'unixepoch') AS month
+        FROM {ROLLUP_TABLE_NAMES['day']}
+        WHERE time < :cutoff
+        ORDER BY month
+        """), {"cutoff": cutoff})]
+
+
+def copy_partition_tables(conn, schema, since=None):
+    """Copia as tabelas da partição anexada como `schema` para o banco da conexão, em ordem de horário.
+
+    `since` ({nome da tabela: epoch}) descarta as linhas anteriores ao horário informado.
+    """
+    since = since or {}
+    for table in PARTITIONED_TABLES:
+        condition = f"WHERE time >= {int(since[table.name])}" if since.get(table.name) is not None else ""
+        conn.execute(text(f"INSERT INTO {table.name} SELECT * FROM {schema}.{table.name} {condition} ORDER BY time"))
+
+
+def rewrite_partition(month, fill):
+    """Grava a partição do mês em um arquivo temporário e substitui a atual de uma vez.
+
+    `fill(conn, sealed)` preenche as tabelas do arquivo novo; com `sealed`, a partição atual
+    está anexada à conexão como 'sealed'. Retorna (amostras, menor e maior horário) do arquivo novo.
+    """
+    path = partition_path(month)
+    tmp_path = path + ".tmp"
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    part_engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        partition_metadata.create_all(part_engine)
+        with part_engine.connect() as conn:
+            sealed = os.path.exists(path)
+            if sealed:
+                conn.execute(text("ATTACH DATABASE :path AS sealed"), {"path": path})
+            fill(conn, sealed)
+            stats = tuple(conn.execute(text(f"SELECT COUNT(*), MIN(time), MAX(time) FROM {TABLE_NAME}")).first())
+            conn.rollback()
+            if sealed:
+                conn.execute(text("DETACH DATABASE sealed"))
+    finally:
+        part_engine.dispose()
+    os.replace(tmp_path, path)
+    return stats
+
+
+def record_partition(conn, month, stats):
+    """Registra (ou atualiza) a partição do mês no catálogo, na transação corrente."""
+    samples, time_min, time_max = stats
+    conn.execute(text(f"""
+        INSERT INTO {PARTITION_CATALOG_TABLE_NAME} (month, file_name, samples, time_min, time_max, sealed_at)
+        VALUES (:month, :file_name, :samples, :time_min, :time_max, :sealed_at)
+        ON CONFLICT(month) DO UPDATE SET
+            file_name = excluded.file_name,
+            samples = excluded.samples,
+            time_min = excluded.time_min,
+            time_max = excluded.time_max,
+            sealed_at = excluded.sealed_at
+        """), {
+            "month": month,
+            "file_name": os.path.basename(partition_path(month)),
+            "samples": samples,
+            "time_min": time_min,
+            "time_max": time_max,
+            "sealed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+
+def seal_month(month):
+    """Move o mês do banco principal para sua partição, mesclando com a partição existente.
+
+    O arquivo novo recebe o conteúdo da partição atual e as amostras do banco principal (em ordem
+    de horário; as já seladas prevalecem), e os rollups são recalculados só no intervalo das amostras
+    vindas do banco principal. Depois, em uma transação, o mês é apagado do banco principal,
+    registrado no catálogo e recalculado no calendário, e as páginas liberadas voltam ao disco
+    (incremental_vacuum). Retorna a quantidade de amostras da partição.
+    """
+    start, end = month_bounds(month)
+    columns = ', '.join(c.name for c in raw_data_table.columns)
+
+    def fill(conn, sealed):
+        conn.execute(text("ATTACH DATABASE :path AS hot"), {"path": DB_PATH})
+        begin_transaction(conn)
+        if sealed:
+            copy_partition_tables(conn, "sealed")
+        # Amostras já seladas prevalecem sobre as recebidas depois (mesma regra do ETL: fica a primeira)
+        params = {"start": start, "end": end}
+        conn.execute(text(f"""
+            INSERT INTO {TABLE_NAME} ({columns})
+            SELECT {columns} FROM hot.{TABLE_NAME}
+            WHERE time >= :start AND time < :end
+            ORDER BY time
+            ON CONFLICT(time) DO NOTHING
+            """), params)
+        hot_min, hot_max = conn.execute(
+            text(f"SELECT MIN(time), MAX(time) FROM hot.{TABLE_NAME} WHERE time >= :start AND time < :end"), params
+        ).first()
+        if hot_min is not None:
+            refresh_rollups(conn, hot_min, hot_max)
+        conn.commit()
+        conn.execute(text("DETACH DATABASE hot"))
+
+    stats = rewrite_partition(month, fill)
+
+    with engine.connect() as conn:
+        conn.execute(text("ATTACH DATABASE :path AS sealed"), {"path": partition_path(month)})
+        try:
+            begin_transaction(conn)
+            for table in PARTITIONED_TABLES:
+                conn.execute(text(f"DELETE FROM {table.name} WHERE time >= :start AND time < :end"), {"start": start, "end": end})
+            record_partition(conn, month, stats)
+            # Calendário do mês recalculado a partir da partição, que agora tem todas as amostras do mês
+            refresh_calendar(conn, start, end - 1, schema="sealed", replace=True)
+            bump_data_generation(conn)
+            conn.commit()
+        finally:
+            conn.execute(text("DETACH DATABASE sealed"))
+        # As páginas do mês apagado voltam ao disco: o banco principal fica com o tamanho dos meses recentes
+        incremental_vacuum(conn)
+    return stats[0]
+
+
+def seal_closed_months(now=None):
+    """Sela todos os meses encerrados que ainda têm dados no banco principal.
+
+    Um mês que não puder ser selado (ex.: partição aberta por outro processo no Windows)
+    continua no banco principal e é tentado de novo na próxima execução.
+    """
+    with engine.connect() as conn:
+        months = months_to_seal(conn, now)
+    for month in months:
+        try:
+            samples = seal_month(month)
+            print(f"Mês {month} selado em '{partition_path(month)}' ({samples} amostras).")
+        except OSError as e:
+            print(f"Não foi possível selar o mês {month}: {e}")
+    return months
+
+
+class PartitionPlan:
+    """Leitura do banco principal junto com as partições dos meses informados.
+
+    Até ATTACH_LIMIT meses, cada tabela é lida como um UNION ALL entre o banco principal e as
+    partições anexadas; acima disso, as linhas das partições são copiadas, em grupos de
+    ATTACH_LIMIT arquivos, para tabelas temporárias da conexão.
+    """
+
+    def __init__(self, months, tables):
+        self.months = list(months)
+        self.tables = list(tables)
+        self.staged = len(self.months) > ATTACH_LIMIT
+
+    def source(self, table):
+        """Expressão SQL (para o FROM) com as linhas de `table` em todas as fontes do plano."""
+        if not self.months:
+            return table
+        if self.staged:
+            parts = [f"temp.{table}_partitions"]
+        else:
+            parts = [f"part_{i}.{table}" for i in range(len(self.months))]
+        return "(" + " UNION ALL ".join(f"SELECT * FROM {name}" for name in [f"main.{table}"] + parts) + ")"
+
+    @contextmanager
+    def connect(self, engine):
+        """Conexão com as partições do plano anexadas (ou copiadas), desfeitas ao sair."""
+        with engine.connect() as conn:
+            attached = []
+            # query_only (perfil do dashboard) também bloqueia tabelas temporárias: liberado só durante a cópia
+            query_only = self.staged and conn.exec_driver_sql("PRAGMA query_only").scalar()
+            try:
+                if self.staged:
+                    conn.exec_driver_sql("PRAGMA query_only = 0")
+                    for table in self.tables:
+                        conn.execute(text(f"CREATE TEMP TABLE {table}_partitions AS SELECT * FROM main.{table} WHERE 0"))
+                    for i in range(0, len(self.months), ATTACH_LIMIT):
+                        group = self.months[i:i + ATTACH_LIMIT]
+                        for j, month in enumerate(group):
+                            conn.execute(text(f"ATTACH DATABASE :path AS part_{j}"), {"path": partition_path(month)})
+                            attached.append(f"part_{j}")
+                            for table in self.tables:
+                                conn.execute(text(f"INSERT INTO temp.{table}_partitions SELECT * FROM part_{j}.{table}"))
+                        conn.commit()
+                        while attached:
+                            conn.execute(text(f"DETACH DATABASE {attached.pop()}"))
+                    conn.exec_driver_sql(f"PRAGMA query_only = {int(query_only)}")
+                else:
+                    for i, month in enumerate(self.months):
+                        conn.execute(text(f"ATTACH DATABASE :path AS part_{i}"), {"path": partition_path(month)})
+                        attached.append(f"part_{i}")
+                yield conn
+            finally:
+                conn.rollback()
+                while attached:
+                    conn.execute(text(f"DETACH DATABASE {attached.pop()}"))
+                if self.staged:
+                    conn.exec_driver_sql("PRAGMA query_only = 0")
+                    for table in self.tables:
+                        conn.execute(text(f"DROP TABLE IF EXISTS temp.{table}_partitions"))
+                    conn.commit()
+                    conn.exec_driver_sql(f"PRAGMA query_only = {int(query_only)}")
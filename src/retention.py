@@ -0,0 +1,158 @@
+# Política de retenção: amostras de raw_data por RETENTION_RAW_DAYS dias, rollup por minuto por
+# RETENTION_MINUTE_DAYS dias e rollups por hora/dia para sempre.
+# No banco principal as linhas são apagadas em lotes curtos (o dashboard continua lendo entre eles)
+# seguidos de incremental_vacuum; as partições mensais são regravadas sem as linhas descartadas.
+# A marca de cada tabela (tabela retention) impede que o ETL grave amostras já fora da retenção:
+# os rollups desses períodos não podem mais ser recalculados a partir de raw_data.
+
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from config import DB_PATH, RETENTION_RAW_DAYS, RETENTION_MINUTE_DAYS, RETENTION_BATCH_ROWS
+from src.database import engine
+from src.migrations import begin_transaction, incremental_vacuum
+from src.models import TABLE_NAME, ROLLUP_TABLE_NAMES, RETENTION_TABLE_NAME
+from src.partitions import (
+    month_bounds, partition_path, sealed_months, rewrite_partition, copy_partition_tables, record_partition
+)
+from src.rollups import to_epoch
+
+ROLLUP_MINUTE = ROLLUP_TABLE_NAMES["minute"]
+
+
+def retention_cutoffs(now=None):
+    """{tabela: epoch (início de dia)} antes do qual as linhas são descartadas, pela configuração.
+
+    O rollup por minuto nunca é podado depois das amostras: é a partir dele que os rollups por
+    hora são recalculados quando chegam amostras novas.
+    """
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoffs = {}
+    if RETENTION_RAW_DAYS is not None:
+        cutoffs[TABLE_NAME] = to_epoch(today - timedelta(days=RETENTION_RAW_DAYS))
+        if RETENTION_MINUTE_DAYS is not None:
+            cutoffs[ROLLUP_MINUTE] = min(to_epoch(today - timedelta(days=RETENTION_MINUTE_DAYS)), cutoffs[TABLE_NAME])
+    return cutoffs
+
+
+def pruned_before(conn, table_name=TABLE_NAME):
+    """Marca de retenção da tabela (epoch), ou None se ela nunca foi podada."""
+    return conn.execute(
+        text(f"SELECT pruned_before FROM {RETENTION_TABLE_NAME} WHERE table_name = :table_name"),
+        {"table_name": table_name}
+    ).scalar()
+
+
+def record_cutoffs(conn, cutoffs):
+    """Grava as marcas de retenção; uma marca nunca recua (o que foi apagado não volta)."""
+    for table_name, cutoff in cutoffs.items():
+        conn.execute(text(f"""
+            INSERT INTO {RETENTION_TABLE_NAME} (table_name, pruned_before, applied_at)
+            VALUES (:table_name, :pruned_before, :applied_at)
+            ON CONFLICT(table_name) DO UPDATE SET
+                pruned_before = MAX(pruned_before, excluded.pruned_before),
+                applied_at = excluded.applied_at
+            """), {
+                "table_name": table_name,
+                "pruned_before": cutoff,
+                "applied_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+
+
+def main_db_size(conn):
+    """Tamanho do arquivo do banco principal, em bytes, depois de transferir o WAL para ele.
+
+    Em WAL, as páginas alteradas (inclusive pelo VACUUM) ficam no arquivo -wal até o checkpoint.
+    """
+    conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(DB_PATH)
+
+
+def prune_main(conn, table_name, cutoff, batch_rows=RETENTION_BATCH_ROWS):
+    """Apaga do banco principal as linhas anteriores a `cutoff`, em lotes de `batch_rows` (um commit cada).
+
+    Cada lote termina com incremental_vacuum, que devolve ao disco as páginas liberadas.
+    Retorna o número de linhas apagadas.
+    """
+    deleted = 0
+    while True:
+        # Horário final do lote: a linha de número `batch_rows` anterior ao corte (ou o próprio corte)
+        batch_end = conn.execute(
+            text(f"SELECT time FROM {table_name} WHERE time < :cutoff ORDER BY time LIMIT 1 OFFSET :offset"),
+            {"cutoff": cutoff, "offset": batch_rows}
+        ).scalar()
+        begin_transaction(conn)
+        result = conn.execute(
+            text(f"DELETE FROM {table_name} WHERE time < :end"),
+            {"end": cutoff if batch_end is None else batch_end}
+        )
+        conn.commit()
+        incremental_vacuum(conn)
+        deleted += result.rowcount
+        if batch_end is None:
+            return deleted
+
+
+def prune_partition(month, cutoffs):
+    """Regrava a partição do mês sem as linhas anteriores às marcas (rollups por hora/dia ficam)."""
+    def fill(conn, sealed):
+        begin_transaction(conn)
+        copy_partition_tables(conn, "sealed", since=cutoffs)
+        conn.commit()
+
+    return rewrite_partition(month, fill)
+
+
+def partition_needs_pruning(month, cutoffs):
+    """Se a partição do mês ainda tem linhas anteriores a alguma das marcas."""
+    with engine.connect() as conn:
+        conn.execute(text("ATTACH DATABASE :path AS part"), {"path": partition_path(month)})
+        try:
+            return any(
+                conn.execute(text(f"SELECT 1 FROM part.{table_name} WHERE time < :cutoff LIMIT 1"), {"cutoff": cutoff}).first()
+                for table_name, cutoff in cutoffs.items()
+            )
+        finally:
+            conn.execute(text("DETACH DATABASE part"))
+
+
+def apply_retention(now=None):
+    """Aplica a política de retenção ao banco principal e às partições mensais."""
+    cutoffs = retention_cutoffs(now)
+    if not cutoffs:
+        print("Nenhuma política de retenção configurada (RETENTION_RAW_DAYS = None).")
+        return
+    with engine.connect() as conn:
+        size_before = main_db_size(conn)
+        # As marcas são gravadas primeiro: a partir daqui o ETL já descarta amostras anteriores a elas
+        begin_transaction(conn)
+        record_cutoffs(conn, cutoffs)
+        conn.commit()
+        cutoffs = {table_name: pruned_before(conn, table_name) for table_name in cutoffs}
+        for table_name, cutoff in cutoffs.items():
+            print(f"{table_name}: descartando linhas anteriores a {datetime(1970, 1, 1) + timedelta(seconds=cutoff):%Y-%m-%d}...")
+            print(f"   -> {prune_main(conn, table_name, cutoff)} linhas apagadas do banco principal.")
+
+        months = sealed_months(conn)
+
+    for month in months:
+        if month_bounds(month)[0] >= max(cutoffs.values()) or not partition_needs_pruning(month, cutoffs):
+            continue
+        try:
+            stats = prune_partition(month, cutoffs)
+        except OSError as e:
+            print(f"Não foi possível regravar a partição {month}: {e}")
+            continue
+        with engine.begin() as conn:
+            record_partition(conn, month, stats)
+        print(f"Partição {month} regravada ({stats[0]} amostras mantidas).")
+
+    with engine.connect() as conn:
+        # Bancos criados antes da retenção: um VACUUM completo, uma única vez, ativa o modo incremental
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            print("Ativando auto_vacuum incremental (VACUUM completo, apenas nesta execução)...")
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        size_after = main_db_size(conn)
+
+    print(f"Banco principal: {size_before / 2**20:.1f} MB -> {size_after / 2**20:.1f} MB.")
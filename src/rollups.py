@@ -0,0 +1,214 @@
+# Manutenção dos rollups (minuto, hora, dia e dia x temperatura) a partir de raw_data.
+# Após cada carga, apenas os buckets tocados pelas amostras inseridas são recalculados:
+# minuto a partir de raw_data, hora a partir de minuto e dia a partir de hora.
+# Os horários são inteiros (epoch): o bucket é `time - time % <segundos do bucket>`.
+# O primeiro e o último horário de cada dia em rollup_day vêm direto de raw_data.
+# O calendário (calendar_days, no banco principal) é derivado de rollup_day na mesma carga.
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from src.models import (
+    TABLE_NAME, ROLLUP_METRICS, ROLLUP_TABLE_NAMES, ROLLUP_DAY_TEMP_TABLE_NAME, ROLLUP_DAY_TEMP_METRICS,
+    CALENDAR_TABLE_NAME, DATA_VERSION_TABLE_NAME
+)
+
+DAY_SECONDS = 86400
+
+# (nível, tabela de origem, segundos por bucket)
+ROLLUP_CHAIN = [
+    ("minute", TABLE_NAME, 60),
+    ("hour", ROLLUP_TABLE_NAMES["minute"], 3600),
+    ("day", ROLLUP_TABLE_NAMES["hour"], DAY_SECONDS),
+]
+
+
+def to_epoch(value):
+    """Horário (Timestamp, datetime, texto ou epoch inteiro) -> segundos desde a época."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 10**9)
+
+
+def bucket_range(time_min, time_max, bucket_seconds):
+    """Intervalo [início, fim) alinhado aos buckets que contêm `time_min`..`time_max` (epoch)."""
+    return {
+        "start": time_min - time_min % bucket_seconds,
+        "end": time_max - time_max % bucket_seconds + bucket_seconds
+    }
+
+
+def aggregate_columns(metrics):
+    """Nomes das colunas de agregado, na ordem das expressões de aggregate_expressions."""
+    return [f"{m}_{agg}" for m in metrics for agg in ('count', 'sum', 'min', 'max')]
+
+
+def aggregate_expressions(metrics, from_raw):
+    """Expressões SQL de agregação: sobre amostras (raw_data) ou recombinando um rollup mais fino."""
+    expressions = []
+    for m in metrics:
+        if from_raw:
+            expressions += [f"COUNT({m})", f"SUM({m})", f"MIN({m})", f"MAX({m})"]
+        else:
+            expressions += [f"SUM({m}_count)", f"SUM({m}_sum)", f"MIN({m}_min)", f"MAX({m}_max)"]
+    return expressions
+
+
+def refresh_rollups(conn, time_min, time_max):
+    """Recalcula os buckets de todos os níveis que contêm amostras entre `time_min` e `time_max`.
+
+    Cada nível apaga e regrava seus buckets no intervalo (alinhado ao próprio bucket),
+    então a operação é idempotente e pode rodar na mesma transação da carga.
+    """
+    time_min, time_max = to_epoch(time_min), to_epoch(time_max)
+    columns = ', '.join(['time', 'samples'] + aggregate_columns(ROLLUP_METRICS))
+
+    for level, source, bucket_seconds in ROLLUP_CHAIN:
+        from_raw = source == TABLE_NAME
+        params = bucket_range(time_min, time_max, bucket_seconds)
+        table = ROLLUP_TABLE_NAMES[level]
+        conn.execute(text(f"DELETE FROM {table} WHERE time >= :start AND time < :end"), params)
+        conn.execute(text(f"""
+            INSERT INTO {table} ({columns})
+            SELECT time - time % {bucket_seconds} AS bucket,
+                   {'COUNT(*)' if from_raw else 'SUM(samples)'},
+                   {', '.join(aggregate_expressions(ROLLUP_METRICS, from_raw))}
+            FROM {source}
+            WHERE time >= :start AND time < :end
+            GROUP BY bucket
+            """), params)
+    refresh_day_times(conn, **bucket_range(time_min, time_max, DAY_SECONDS))
+
+    # Dia x temperatura do núcleo 0, direto das amostras do(s) dia(s) tocado(s)
+    params = bucket_range(time_min, time_max, DAY_SECONDS)
+    columns = ', '.join(['time', 'core_temp_0', 'samples'] + aggregate_columns(ROLLUP_DAY_TEMP_METRICS))
+    conn.execute(text(f"DELETE FROM {ROLLUP_DAY_TEMP_TABLE_NAME} WHERE time >= :start AND time < :end"), params)
+    conn.execute(text(f"""
+        INSERT INTO {ROLLUP_DAY_TEMP_TABLE_NAME} ({columns})
+        SELECT time - time % {DAY_SECONDS} AS bucket, core_temp_0, COUNT(*),
+               {', '.join(aggregate_expressions(ROLLUP_DAY_TEMP_METRICS, True))}
+        FROM {TABLE_NAME}
+        WHERE time >= :start AND time < :end
+        GROUP BY bucket, core_temp_0
+        """), params)
+
+
+def refresh_day_times(conn, start=None, end=None, schema="main"):
+    """Grava em rollup_day o primeiro e o último horário de raw_data de cada dia em [start, end) (todos, sem eles).
+
+    Cada dia é uma busca pela chave primária de raw_data; dias sem amostras (já podadas) ficam com NULL.
+    """
+    condition, params = "", {}
+    if start is not None:
+        condition, params = "WHERE time >= :start AND time < :end", {"start": start, "end": end}
+    day = ROLLUP_TABLE_NAMES['day']
+
+    def sample_time(agg):
+        return f"""(SELECT {agg}(time) FROM {schema}.{TABLE_NAME}
+                    WHERE time >= {day}.time AND time < {day}.time + {DAY_SECONDS})"""
+
+    conn.execute(text(f"""
+        UPDATE {schema}.{day}
+        SET time_min = {sample_time('MIN')}, time_max = {sample_time('MAX')}
+        {condition}
+        """), params)
+
+
+def refresh_calendar(conn, time_min=None, time_max=None, schema="main", replace=False):
+    """Atualiza calendar_days com os dias de `schema`.rollup_day entre `time_min` e `time_max` (todos, sem eles).
+
+    O primeiro e o último horário do dia vêm de rollup_day (refresh_day_times).
+    No banco principal, um dia de mês já selado só tem as amostras recebidas depois da selagem:
+    sem `replace` a contagem existente só aumenta (e o intervalo só se amplia), e a selagem seguinte
+    (com `replace`, a partir da partição completa) grava os valores exatos.
+    """
+    condition, params = "", {}
+    if time_min is not None:
+        condition = "WHERE d.time >= :start AND d.time < :end"
+        params = bucket_range(to_epoch(time_min), to_epoch(time_max), DAY_SECONDS)
+    if replace:
+        update = "samples = excluded.samples, time_min = excluded.time_min, time_max = excluded.time_max"
+    else:
+        update = """samples = MAX(samples, excluded.samples),
+            time_min = MIN(COALESCE(time_min, excluded.time_min), COALESCE(excluded.time_min, time_min)),
+            time_max = MAX(COALESCE(time_max, excluded.time_max), COALESCE(excluded.time_max, time_max))"""
+
+    conn.execute(text(f"""
+        INSERT INTO main.{CALENDAR_TABLE_NAME} (time, year, month, day, samples, time_min, time_max)
+        SELECT d.time,
+               CAST(strftime('%Y', d.time, 'unixepoch') AS INTEGER),
+               CAST(strftime('%m', d.time, 'unixepoch') AS INTEGER),
+               CAST(strftime('%d', d.time, 'unixepoch') AS INTEGER),
+               d.samples,
+               d.time_min,
+               d.time_max
+        FROM {schema}.{ROLLUP_TABLE_NAMES['day']} AS d
+        {condition or 'WHERE true'}
+        ON CONFLICT(time) DO UPDATE SET {update}
+        """), params)
+
+
+def bump_data_generation(conn):
+    """Incrementa a geração dos dados na transação corrente: o dashboard descarta o cache no próximo acesso."""
+    conn.execute(text(f"""
+        INSERT INTO {DATA_VERSION_TABLE_NAME} (id, generation, updated_at)
+        VALUES (1, 1, :updated_at)
+        ON CONFLICT(id) DO UPDATE SET
+            generation = generation + 1,
+            updated_at = excluded.updated_at
+        """), {"updated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+
+
+class RollupRanges:
+    """Intervalos de horário inseridos durante uma carga, mesclados para recalcular os rollups uma vez."""
+
+    def __init__(self):
+        self.intervals = []
+
+    def add(self, time_min, time_max):
+        if pd.notna(time_min) and pd.notna(time_max):
+            self.intervals.append((to_epoch(time_min), to_epoch(time_max)))
+
+    def merged(self):
+        """Intervalos ordenados; os que se sobrepõem ou distam menos de um dia viram um só."""
+        merged = []
+        for start, end in sorted(self.intervals):
+            if merged and start <= merged[-1][1] + DAY_SECONDS:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def refresh(self, conn, floor=None):
+        """Recalcula os rollups de todos os intervalos registrados (e incrementa a geração dos dados).
+
+        Com `floor` (marca de retenção de raw_data), os intervalos são cortados nesse horário:
+        antes dele as amostras já foram descartadas e os rollups existentes são definitivos.
+        """
+        refreshed = False
+        for start, end in self.merged():
+            if floor is not None:
+                start = max(start, floor)
+            if start <= end:
+                refresh_rollups(conn, start, end)
+                refresh_calendar(conn, start, end)
+                refreshed = True
+        if refreshed:
+            bump_data_generation(conn)
+        self.intervals = []
+
+
+def rebuild_rollups(conn, since=None):
+    """Recalcula todos os rollups a partir de raw_data (backfill de bancos existentes).
+
+    Com `since` (marca de retenção, início de dia), os buckets anteriores são mantidos.
+    """
+    condition, params = ("", {}) if since is None else ("WHERE time >= :since", {"since": since})
+    for table in list(ROLLUP_TABLE_NAMES.values()) + [ROLLUP_DAY_TEMP_TABLE_NAME]:
+        conn.execute(text(f"DELETE FROM {table} {condition}"), params)
+    row = conn.execute(text(f"SELECT MIN(time), MAX(time) FROM {TABLE_NAME} {condition}"), params).first()
+    if row[0] is None:
+        return False
+    refresh_rollups(conn, row[0], row[1])
+    return True
@@ -17,12 +17,12 @@ def line_chart(df, x_column, y_column, category_column, title=None):
 
 
 # Gráfico de colunas (barras), com rótulos opcionais
-def column_chart(df, x_column, y_column, title=None, show_labels=True, label_format=',.0f', label_position='outside', label_color=None, aggregation=None, width=700, height=400):
+def column_chart(df, x_column, y_column, title=None, show_labels=True, label_format=',.0f', label_position='outside', label_color=None, aggregation=None, width=700, height=400, x_sort='ascending'):
 
     y_field = f'{aggregation}({y_column}):Q' if aggregation else f'{y_column}:Q'
 
     base = alt.Chart(df).encode(
-        x=alt.X(f'{x_column}:O', title=x_column, axis=alt.Axis(labelAngle=0)),
+        x=alt.X(f'{x_column}:O', title=x_column, axis=alt.Axis(labelAngle=0), sort=x_sort),
         y=alt.Y(y_field, title=y_column),
         tooltip=[
             alt.Tooltip(f'{x_column}:O', title=x_column),
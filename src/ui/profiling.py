@@ -0,0 +1,168 @@
+# Perfil das consultas do dashboard (DASHBOARD_PROFILE em config.py): tempo, linhas devolvidas, instruções
+# da VM do SQLite, acerto de cache e EXPLAIN QUERY PLAN de cada chamada das funções de src/ui/queries.py.
+# Cada execução da página (uma thread do Streamlit) acumula suas chamadas; o app.py as mostra na barra
+# lateral e as acrescenta a DASHBOARD_PROFILE_PATH (uma linha JSON por chamada).
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
+from config import DASHBOARD_PROFILE, DASHBOARD_PROFILE_PATH
+
+# Intervalo do progress handler do SQLite: as instruções da VM são contadas em múltiplos deste valor
+VM_STEPS_PER_TICK = 1000
+
+# Chamadas da execução corrente e chamada em andamento, por thread
+_local = threading.local()
+
+
+@dataclass
+class QueryProfile:
+    """Uma consulta SQL executada dentro de uma chamada perfilada."""
+    sql: str
+    params: dict
+    seconds: float
+    rows: int
+    vm_steps: int
+    plan: list
+    full_scans: list
+
+
+@dataclass
+class CallProfile:
+    """Uma chamada de função de consulta; sem consultas executadas, o resultado veio do cache."""
+    function: str
+    arguments: dict
+    seconds: float = 0.0
+    rows: int = 0
+    queries: list = field(default_factory=list)
+
+    @property
+    def cache(self):
+        return "miss" if self.queries else "hit"
+
+
+def start_run():
+    """Descarta as chamadas registradas pela execução anterior da página nesta thread."""
+    _local.calls = []
+    _local.current = None
+
+
+def calls():
+    """Chamadas registradas na execução corrente da página."""
+    return getattr(_local, "calls", [])
+
+
+def count_rows(result):
+    """Linhas devolvidas: DataFrame, lista ou {nome: DataFrame} (soma das séries)."""
+    if isinstance(result, dict):
+        return sum(count_rows(value) for value in result.values())
+    return 0 if result is None else len(result)
+
+
+def profiled(func):
+    """Registra cada chamada de `func` com DASHBOARD_PROFILE; sem ele, devolve a própria função."""
+    if not DASHBOARD_PROFILE:
+        return func
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Chamadas aninhadas entram na chamada externa
+        if getattr(_local, "current", None) is not None:
+            return func(*args, **kwargs)
+        call = CallProfile(func.__name__, dict(signature.bind(*args, **kwargs).arguments))
+        _local.current = call
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            call.seconds = time.perf_counter() - start
+            _local.current = None
+            if not hasattr(_local, "calls"):
+                _local.calls = []
+            _local.calls.append(call)
+        call.rows = count_rows(result)
+        return result
+
+    return wrapper
+
+
+def full_scans(plan):
+    """Passos do plano que percorrem uma tabela inteira (SCAN sem índice nem chave primária).
+
+    A leitura das subconsultas (ex.: 'SCAN (subquery-2)', o UNION ALL das partições) não conta:
+    as tabelas dentro delas aparecem em passos próprios.
+    """
+    return [
+        detail for detail in plan
+        if detail.startswith("SCAN ") and not detail.startswith(("SCAN (", "SCAN CONSTANT ROW"))
+    ]
+
+
+def read_sql(conn, query, params=None):
+    """pd.read_sql_query; dentro de uma chamada perfilada, registra plano, tempo, linhas e instruções da VM."""
+    call = getattr(_local, "current", None)
+    if call is None:
+        return pd.read_sql_query(text(query), conn, params=params)
+
+    plan = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params or {})]
+    dbapi_connection = conn.connection.driver_connection
+    ticks = [0]
+
+    def tick():
+        ticks[0] += 1
+
+    dbapi_connection.set_progress_handler(tick, VM_STEPS_PER_TICK)
+    start = time.perf_counter()
+    try:
+        df = pd.read_sql_query(text(query), conn, params=params)
+    finally:
+        seconds = time.perf_counter() - start
+        dbapi_connection.set_progress_handler(None, 0)
+    call.queries.append(QueryProfile(
+        sql=" ".join(query.split()),
+        params=dict(params or {}),
+        seconds=seconds,
+        rows=len(df),
+        vm_steps=ticks[0] * VM_STEPS_PER_TICK,
+        plan=plan,
+        full_scans=full_scans(plan)
+    ))
+    return df
+
+
+def summary(profile_calls):
+    """Tabela do painel: uma linha por chamada."""
+    return pd.DataFrame([{
+        "função": call.function,
+        "argumentos": ", ".join(f"{k}={v}" for k, v in call.arguments.items()),
+        "cache": call.cache,
+        "ms": round(call.seconds * 1000, 1),
+        "linhas": call.rows,
+        "consultas": len(call.queries),
+        "instruções VM": sum(q.vm_steps for q in call.queries),
+        "varreduras completas": sum(len(q.full_scans) for q in call.queries),
+    } for call in profile_calls])
+
+
+def write(profile_calls, path=DASHBOARD_PROFILE_PATH):
+    """Acrescenta as chamadas ao arquivo JSON-lines (uma linha por chamada)."""
+    if not profile_calls:
+        return path
+    run_id = datetime.now().isoformat(timespec='seconds')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for call in profile_calls:
+            record = {'run_id': run_id, 'cache': call.cache, **asdict(call)}
+            record['seconds'] = round(record['seconds'], 4)
+            for query in record['queries']:
+                query['seconds'] = round(query['seconds'], 4)
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    return path
@@ -1,16 +1,49 @@
 from sqlalchemy import text
-import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
-from src.database import engine
-from src.models import TABLE_NAME
+from config import DASHBOARD_CACHE_MAX_ENTRIES, DASHBOARD_CACHE_PERSIST
+from src import database
+from src.models import ROLLUP_TABLE_NAMES, ROLLUP_DAY_TEMP_TABLE_NAME, CALENDAR_TABLE_NAME, DATA_VERSION_TABLE_NAME
+from src.rollups import to_epoch
+from src.partitions import PartitionPlan, sealed_months
+from src.ui.profiling import profiled, read_sql
 
-# Conexão com SQLite
+# As consultas leem o rollup mais grosso que as atende (ver src/rollups.py), em vez das amostras de raw_data:
+# resumo diário e filtros -> rollup_day; séries por hora do dia -> rollup_hour;
+# relações com a temperatura e faixas -> rollup_day_temp (dia x temperatura do núcleo 0).
+# Meses encerrados ficam em partições mensais (src/partitions.py): cada consulta lê o banco
+# principal junto com as partições que podem conter dados do filtro (partition_plan).
+# Anos, meses e dias disponíveis vêm do calendário (calendar_days, uma linha por dia no banco principal).
+# Os resultados ficam em cache com a geração dos dados na chave: após cada carga, o próximo acesso
+# já lê os dados novos (ver cached e data_generation).
+ROLLUP_DAY = ROLLUP_TABLE_NAMES["day"]
+ROLLUP_HOUR = ROLLUP_TABLE_NAMES["hour"]
+
+# Conexão com SQLite (perfil somente leitura do dashboard, ver src/database.py)
 @st.cache_resource
 def get_engine():
-    return engine
+    return database.get_engine("dashboard")
+
+
+# Cache das consultas: no máximo DASHBOARD_CACHE_MAX_ENTRIES entradas por função e, com
+# DASHBOARD_CACHE_PERSIST, cópia em disco que sobrevive a reinícios do dashboard
+cached = st.cache_data(max_entries=DASHBOARD_CACHE_MAX_ENTRIES, persist=DASHBOARD_CACHE_PERSIST)
+
+last_generation = None
+
 
-# Montagem de WHERE e parâmetros para ano/mês/dia
+# Geração atual dos dados (incrementada pelo ETL a cada carga, ver src/rollups.py), passada às funções
+# em cache como parte da chave. Quando muda, as entradas das gerações anteriores (memória e disco) são descartadas
+def data_generation():
+    global last_generation
+    with get_engine().connect() as conn:
+        generation = conn.execute(text(f"SELECT generation FROM {DATA_VERSION_TABLE_NAME}")).scalar() or 0
+    if last_generation is not None and generation != last_generation:
+        st.cache_data.clear()
+    last_generation = generation
+    return generation
+
+# Montagem de WHERE e parâmetros para ano/mês/dia ('time' em segundos desde a época)
 def date_filters(year=None, month=None, day=None):
 
     conds = []
@@ -25,8 +58,8 @@ def date_filters(year=None, month=None, day=None):
                 start_date = datetime(y, m, d)
                 end_date = start_date + timedelta(days=1)
                 conds.append("time >= :start_date AND time < :end_date")
-                params["start_date"] = start_date.strftime("%Y-%m-%d %H:%M:%S")
-                params["end_date"] = end_date.strftime("%Y-%m-%d %H:%M:%S")
+                params["start_date"] = to_epoch(start_date)
+                params["end_date"] = to_epoch(end_date)
             else:
                 start_date = datetime(y, m, 1)
                 if m == 12:
@@ -34,338 +67,277 @@ def date_filters(year=None, month=None, day=None):
                 else:
                     end_date = datetime(y, m + 1, 1)
                 conds.append("time >= :start_date AND time < :end_date")
-                params["start_date"] = start_date.strftime("%Y-%m-%d %H:%M:%S")
-                params["end_date"] = end_date.strftime("%Y-%m-%d %H:%M:%S")
+                params["start_date"] = to_epoch(start_date)
+                params["end_date"] = to_epoch(end_date)
         else:
             start_date = datetime(y, 1, 1)
             end_date = datetime(y + 1, 1, 1)
             conds.append("time >= :start_date AND time < :end_date")
-            params["start_date"] = start_date.strftime("%Y-%m-%d %H:%M:%S")
-            params["end_date"] = end_date.strftime("%Y-%m-%d %H:%M:%S")
+            params["start_date"] = to_epoch(start_date)
+            params["end_date"] = to_epoch(end_date)
     
     elif month is not None or day is not None:
-        if month is not None:
-            conds.append("strftime('%m', time) = :month")
-            params["month"] = f"{int(month):02d}"
-            
-        if day is not None:
-            conds.append("strftime('%d', time) = :day")
-            params["day"] = f"{int(day):02d}"
+        # Só mês e/ou dia (todos os anos): dias do calendário, em vez de strftime em cada linha
+        calendar_where, params = calendar_filters(month=month, day=day)
+        conds.append(f"time - time % 86400 IN (SELECT time FROM {CALENDAR_TABLE_NAME} {calendar_where})")
 
     where_sql = f"WHERE {' AND '.join(conds)}" if conds else ""
     return where_sql, params
 
 
-@st.cache_data
-def years_available():
-    engine = get_engine()
-    query = f"""
-        SELECT DISTINCT strftime('%Y', time) AS year 
-        FROM {TABLE_NAME} ORDER BY year
-        """
-    with engine.connect() as conn:
-        df = pd.read_sql_query(text(query), conn)
-    return df["year"].tolist()
+# WHERE e parâmetros sobre as colunas year/month/day do calendário
+def calendar_filters(year=None, month=None, day=None):
+    values = {"year": year, "month": month, "day": day}
+    params = {column: int(value) for column, value in values.items() if value is not None}
+    where_sql = f"WHERE {' AND '.join(f'{column} = :{column}' for column in params)}" if params else ""
+    return where_sql, params
 
 
-@st.cache_data
-def months_available(year=None):
-    engine = get_engine()
-    base = f"""
-        SELECT DISTINCT CAST(strftime('%m', time) AS INTEGER) AS month 
-        FROM {TABLE_NAME}
-        """
-    where_sql, params = date_filters(year=year)
+# Valores distintos de uma coluna do calendário (year, month ou day) com os filtros informados
+def calendar_values(column, **filters):
+    where_sql, params = calendar_filters(**filters)
     query = f"""
-        {base}
+        SELECT DISTINCT {column}
+        FROM {CALENDAR_TABLE_NAME}
         {where_sql}
-        ORDER BY month
+        ORDER BY {column}
         """
-    with engine.connect() as conn:
-        df = pd.read_sql_query(text(query), conn, params=params)
-    return df["month"].tolist()
+    with get_engine().connect() as conn:
+        df = read_sql(conn, query, params)
+    return df[column].tolist()
 
 
-@st.cache_data
-def days_available(year=None, month=None):
-    engine = get_engine()
-    base = f"""
-        SELECT DISTINCT CAST(strftime('%d', time) AS INTEGER) AS day 
-        FROM {TABLE_NAME}
-        """
-    where_sql, params = date_filters(year=year, month=month)
-    query = f"""
-        {base}
-        {where_sql}
-        ORDER BY day
+# Poda das partições mensais pelo filtro: ano (e mês) pelo prefixo 'YYYY-MM'; só mês pelo sufixo
+def partition_plan(tables, year=None, month=None, day=None):
+    with get_engine().connect() as conn:
+        months = sealed_months(conn)
+    if year is not None:
+        prefix = f"{int(year):04d}-" + (f"{int(month):02d}" if month is not None else "")
+        months = [m for m in months if m.startswith(prefix)]
+    elif month is not None:
+        months = [m for m in months if m.endswith(f"-{int(month):02d}")]
+    return PartitionPlan(months, tables)
+
+
+# MIN, AVG e MAX de uma métrica (colunas <métrica>_min/_sum/_count/_max dos rollups) em um único GROUP BY,
+# como colunas "<prefix>MIN", "<prefix>AVG" e "<prefix>MAX"
+def min_avg_max_columns(metric, prefix=""):
+    return f"""
+            CAST(MIN({metric}_min) AS INTEGER) AS "{prefix}MIN",
+            CAST(SUM({metric}_sum) / SUM({metric}_count) AS INTEGER) AS "{prefix}AVG",
+            CAST(MAX({metric}_max) AS INTEGER) AS "{prefix}MAX"
     """
-    with engine.connect() as conn:
-        df = pd.read_sql_query(text(query), conn, params=params)
-    return df["day"].tolist()
 
 
-@st.cache_data
-def temp_summary(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
+# Formato longo dos gráficos a partir de uma linha por grupo com colunas MIN/AVG/MAX: colunas `keys`,
+# `value_name` e "type", com todos os MIN, depois os AVG e os MAX (mesma ordem do antigo UNION ALL)
+def long_min_avg_max(wide, keys, value_name, prefix=""):
+    wide = wide[keys + [prefix + t for t in ("MIN", "AVG", "MAX")]].rename(columns=lambda c: c.removeprefix(prefix))
+    df = wide.melt(id_vars=keys, value_vars=["MIN", "AVG", "MAX"], var_name="type", value_name=value_name)
+    return df[keys + [value_name, "type"]]
 
-    query = f"""
-        WITH filtrado AS (
-            SELECT DATE(time) AS time, core_temp_0
-            FROM {TABLE_NAME}
-            {where_sql}
-        )
-        SELECT 
-            CAST(strftime('%Y', time) AS INTEGER) AS "ano",
-            CAST(strftime('%m', time) AS INTEGER) AS "mes",
-            CAST(strftime('%d', time) AS INTEGER) AS "dia",
-            MIN(core_temp_0) AS "core temp",
-            'MIN' AS "type"
-        FROM filtrado
-        GROUP BY ano, mes, dia
-        UNION ALL
-        SELECT 
-            CAST(strftime('%Y', time) AS INTEGER) AS "ano",
-            CAST(strftime('%m', time) AS INTEGER) AS "mes",
-            CAST(strftime('%d', time) AS INTEGER) AS "dia",
-            CAST(AVG(core_temp_0) AS INTEGER) AS "core temp",
-            'AVG' AS "type"
-        FROM filtrado
-        GROUP BY ano, mes, dia
-        UNION ALL
-        SELECT 
-            CAST(strftime('%Y', time) AS INTEGER) AS "ano",
-            CAST(strftime('%m', time) AS INTEGER) AS "mes",
-            CAST(strftime('%d', time) AS INTEGER) AS "dia",
-            MAX(core_temp_0) AS "core temp",
-            'MAX' AS "type"
-        FROM filtrado
-        GROUP BY ano, mes, dia
-        """
-    try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
-    except Exception as e:
-        print(f"Erro ao executar a consulta temp_summary: {e}")
-        return None
 
+# Faixas de temperatura do gráfico de minutos por faixa (limites em ºC; o dashboard permite alterá-los):
+# '<60', '>=60 & <70', ..., '>=90'
+TEMP_RANGE_EDGES = (60, 70, 80, 90)
 
-@st.cache_data
-def temp_vs_speed(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
 
-    query = f"""
-        WITH filtrado AS (
-            SELECT time, core_temp_0, core_speed_0
-            FROM {TABLE_NAME}
-            {where_sql}
-        )
-        SELECT
-            core_temp_0 AS "core temp",
-            CAST(MIN(core_speed_0) AS INTEGER) AS "core speed",
-            'MIN' AS "type"
-        FROM filtrado
-        GROUP BY core_temp_0
-        UNION ALL
-        SELECT
-            core_temp_0 AS "core temp",
-            CAST(AVG(core_speed_0) AS INTEGER) AS "core speed",
-            'AVG' AS "type"
-        FROM filtrado
-        GROUP BY core_temp_0
-        UNION ALL
-        SELECT
-            core_temp_0 AS "core temp",
-            CAST(MAX(core_speed_0) AS INTEGER) AS "core speed",
-            'MAX' AS "type"
-        FROM filtrado
-        GROUP BY core_temp_0
-        """
-    try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
-    except Exception as e:
-        print(f"Erro ao executar a consulta temp_vs_speed: {e}")
-        return None
+def temp_band_labels(edges):
+    labels = [f"<{edges[0]}"]
+    labels += [f">={low} & <{high}" for low, high in zip(edges, edges[1:])]
+    labels.append(f">={edges[-1]}")
+    return labels
 
 
-@st.cache_data
-def time_vs_temp(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
+# Expressão SQL com o número da faixa (1 a len(edges) + 1) de `column` em uma única passada;
+# NULL para valores ausentes. Serve tanto para raw_data quanto para os rollups (ex.: core_temp_0 de rollup_day_temp)
+def temp_band_case(column, edges):
+    whens = "\n".join(f"                WHEN {column} < {int(edge)} THEN {band}" for band, edge in enumerate(edges, start=1))
+    return f"""CASE
+{whens}
+                WHEN {column} IS NOT NULL THEN {len(edges) + 1}
+            END"""
+
+
+@cached
+def cached_calendar_values(column, generation, **filters):
+    return calendar_values(column, **filters)
+
+
+@profiled
+def years_available():
+    return [f"{year:04d}" for year in cached_calendar_values("year", data_generation())]
+
+
+@profiled
+def months_available(year=None):
+    return cached_calendar_values("month", data_generation(), year=year)
+
+
+@profiled
+def days_available(year=None, month=None):
+    return cached_calendar_values("day", data_generation(), year=year, month=month)
+
+
+# Leitores das séries do dashboard: recebem a conexão do plano de partições (plan.connect), o WHERE do
+# filtro e seus parâmetros, leem um rollup uma única vez e devolvem {nome da série: DataFrame}
+# com todas as séries que saem dessa leitura.
+def read_temp_summary(conn, plan, where_sql, params, **options):
     query = f"""
-        WITH filtrado AS (
-            SELECT CAST(strftime('%H', time) AS INTEGER) AS hora, core_temp_0
-            FROM {TABLE_NAME}
-            {where_sql}
-        )
-        SELECT
-            hora AS "time of day",
-            MIN(core_temp_0) AS "core temp",
-            'MIN' AS "type"
-        FROM filtrado
-        GROUP BY hora
-        UNION ALL
-        SELECT
-            hora AS "time of day",
-            CAST(AVG(core_temp_0) AS INTEGER) AS "core temp",
-            'AVG' AS "type"
-        FROM filtrado
-        GROUP BY hora
-        UNION ALL
-        SELECT
-            hora AS "time of day",
-            MAX(core_temp_0) AS "core temp",
-            'MAX' AS "type"
-        FROM filtrado
-        GROUP BY hora
+        SELECT 
+            CAST(strftime('%Y', time, 'unixepoch') AS INTEGER) AS "ano",
+            CAST(strftime('%m', time, 'unixepoch') AS INTEGER) AS "mes",
+            CAST(strftime('%d', time, 'unixepoch') AS INTEGER) AS "dia",{min_avg_max_columns("core_temp_0")}
+        FROM {plan.source(ROLLUP_DAY)}
+        {where_sql}
+        GROUP BY ano, mes, dia
         """
-    try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
-    except Exception as e:
-        print(f"Erro ao executar a consulta time_vs_temp: {e}")
-        return None
+    wide = read_sql(conn, query, params)
+    return {"temp_summary": long_min_avg_max(wide, ["ano", "mes", "dia"], "core temp")}
 
 
-@st.cache_data
-def time_vs_power(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
+# Temperatura e energia ao longo do dia: o mesmo GROUP BY por hora do dia
+def read_hour_of_day(conn, plan, where_sql, params, **options):
     query = f"""
-        WITH filtrado AS (
-            SELECT CAST(strftime('%H', time) AS INTEGER) AS hora, cpu_power
-            FROM {TABLE_NAME}
-            {where_sql}
-        )
-        SELECT
-            hora AS "time of day",
-            CAST(MIN(cpu_power) AS INTEGER) AS "cpu power",
-            'MIN' AS "type"
-        FROM filtrado
-        GROUP BY hora
-        UNION ALL
         SELECT
-            hora AS "time of day",
-            CAST(AVG(cpu_power) AS INTEGER) AS "cpu power",
-            'AVG' AS "type"
-        FROM filtrado
-        GROUP BY hora
-        UNION ALL
-        SELECT
-            hora AS "time of day",
-            CAST(MAX(cpu_power) AS INTEGER) AS "cpu power",
-            'MAX' AS "type"
-        FROM filtrado
-        GROUP BY hora
+            (time % 86400) / 3600 AS "time of day",{min_avg_max_columns("core_temp_0", "temp ")},{min_avg_max_columns("cpu_power", "power ")}
+        FROM {plan.source(ROLLUP_HOUR)}
+        {where_sql}
+        GROUP BY "time of day"
         """
-    try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
-    except Exception as e:
-        print(f"Erro ao executar a consulta time_vs_power: {e}")
-        return None
+    wide = read_sql(conn, query, params)
+    return {
+        "time_vs_temp": long_min_avg_max(wide, ["time of day"], "core temp", "temp "),
+        "time_vs_power": long_min_avg_max(wide, ["time of day"], "cpu power", "power "),
+    }
 
 
-@st.cache_data
-def temp_vs_power(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
+# Velocidade e energia por temperatura do núcleo: o mesmo GROUP BY por temperatura
+def read_by_temp(conn, plan, where_sql, params, **options):
     query = f"""
-        WITH filtrado AS (
-            SELECT core_temp_0, cpu_power
-            FROM {TABLE_NAME}
-            {where_sql}
-        )
-        SELECT
-            core_temp_0 AS "core temp",
-            CAST(MIN(cpu_power) AS INTEGER) AS "cpu power",
-            'MIN' AS "type"
-        FROM filtrado
-        GROUP BY core_temp_0
-        UNION ALL
-        SELECT
-            core_temp_0 AS "core temp",
-            CAST(AVG(cpu_power) AS INTEGER) AS "cpu power",
-            'AVG' AS "type"
-        FROM filtrado
-        GROUP BY core_temp_0
-        UNION ALL
         SELECT
-            core_temp_0 AS "core temp",
-            CAST(MAX(cpu_power) AS INTEGER) AS "cpu power",
-            'MAX' AS "type"
-        FROM filtrado
+            core_temp_0 AS "core temp",{min_avg_max_columns("core_speed_0", "speed ")},{min_avg_max_columns("cpu_power", "power ")}
+        FROM {plan.source(ROLLUP_DAY_TEMP_TABLE_NAME)}
+        {where_sql}
         GROUP BY core_temp_0
         """
-    try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
-    except Exception as e:
-        print(f"Erro ao executar a consulta temp_vs_power: {e}")
-        return None
+    wide = read_sql(conn, query, params)
+    return {
+        "temp_vs_speed": long_min_avg_max(wide, ["core temp"], "core speed", "speed "),
+        "temp_vs_power": long_min_avg_max(wide, ["core temp"], "cpu power", "power "),
+    }
 
 
-@st.cache_data
-def temp_ranges(year=None, month=None, day=None):
-    engine = get_engine()
-    where_sql, params = date_filters(year, month, day)
+def read_temp_ranges(conn, plan, where_sql, params, edges=TEMP_RANGE_EDGES, **options):
+    edges = tuple(sorted(set(edges)))
+    # Uma única leitura: cada linha (dia x temperatura) recebe o número da faixa pela expressão CASE
     query = f"""
-        WITH filtrado AS (
-            SELECT time, core_temp_0
-            FROM {TABLE_NAME}
+        WITH faixas AS (
+            SELECT time, {temp_band_case("core_temp_0", edges)} AS faixa, samples
+            FROM {plan.source(ROLLUP_DAY_TEMP_TABLE_NAME)}
             {where_sql}
         ),
         minutos_por_dia AS (
-            SELECT DATE(time) AS dia, COUNT(time) / 6.0 AS minutos, '<60' AS categoria
-            FROM filtrado
-            WHERE core_temp_0 < 60
-            GROUP BY DATE(time)
-            UNION ALL
-            SELECT DATE(time) AS dia, COUNT(time) / 6.0 AS minutos, '>=60 & <70' AS categoria
-            FROM filtrado
-            WHERE core_temp_0 >= 60 AND core_temp_0 < 70
-            GROUP BY DATE(time)
-            UNION ALL
-            SELECT DATE(time) AS dia, COUNT(time) / 6.0 AS minutos, '>=70 & <80' AS categoria
-            FROM filtrado
-            WHERE core_temp_0 >= 70 AND core_temp_0 < 80
-            GROUP BY DATE(time)
-            UNION ALL
-            SELECT DATE(time) AS dia, COUNT(time) / 6.0 AS minutos, '>=80 & <90' AS categoria
-            FROM filtrado
-            WHERE core_temp_0 >= 80 AND core_temp_0 < 90
-            GROUP BY DATE(time)
-            UNION ALL
-            SELECT DATE(time) AS dia, COUNT(time) / 6.0 AS minutos, '>=90' AS categoria
-            FROM filtrado
-            WHERE core_temp_0 > 90
-            GROUP BY DATE(time)
+            SELECT time AS dia, faixa, SUM(samples) / 6.0 AS minutos
+            FROM faixas
+            WHERE faixa IS NOT NULL
+            GROUP BY time, faixa
         )
         SELECT
             ROUND(AVG(minutos)) AS "media diaria",
-            categoria,
-            CASE
-                WHEN categoria = '<60' THEN 1
-                WHEN categoria = '>=60 & <70' THEN 2
-                WHEN categoria = '>=70 & <80' THEN 3
-                WHEN categoria = '>=80 & <90' THEN 4
-                WHEN categoria = '>=90' THEN 5
-            END AS ordernar
+            faixa AS ordernar
         FROM minutos_por_dia
-        GROUP BY categoria
-        ORDER BY ordernar
+        GROUP BY faixa
+        ORDER BY faixa
         """
+    df = read_sql(conn, query, params)
+    labels = temp_band_labels(edges)
+    df.insert(1, "categoria", [labels[band - 1] for band in df["ordernar"]])
+    return {"temp_ranges": df}
+
+
+# Série -> (rollup lido, leitor); séries com o mesmo leitor saem da mesma leitura
+DATASET_READERS = {
+    "temp_ranges": (ROLLUP_DAY_TEMP_TABLE_NAME, read_temp_ranges),
+    "temp_vs_speed": (ROLLUP_DAY_TEMP_TABLE_NAME, read_by_temp),
+    "time_vs_temp": (ROLLUP_HOUR, read_hour_of_day),
+    "time_vs_power": (ROLLUP_HOUR, read_hour_of_day),
+    "temp_vs_power": (ROLLUP_DAY_TEMP_TABLE_NAME, read_by_temp),
+    "temp_summary": (ROLLUP_DAY, read_temp_summary),
+}
+
+# Séries exibidas pelo app.py
+DASHBOARD_DATASETS = list(DATASET_READERS)
+
+
+# Lê as séries `names` do filtro com um único plano de partições e uma única conexão
+# (catálogo consultado e partições anexadas uma vez), cada leitor executado uma vez
+def read_datasets(names, year=None, month=None, day=None, **options):
+    readers = list(dict.fromkeys(DATASET_READERS[name] for name in names))
+    where_sql, params = date_filters(year, month, day)
+    plan = partition_plan(list(dict.fromkeys(table for table, _ in readers)), year, month, day)
+    results = {}
+    with plan.connect(get_engine()) as conn:
+        for _, reader in readers:
+            results.update(reader(conn, plan, where_sql, params, **options))
+    return {name: results[name] for name in names}
+
+
+def read_dataset(name, year=None, month=None, day=None, **options):
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn, params=params)
-        return df
+        return read_datasets([name], year, month, day, **options)[name]
     except Exception as e:
-        print(f"Erro ao executar a consulta temp_ranges: {e}")
+        print(f"Erro ao executar a consulta {name}: {e}")
         return None
+
+
+@cached
+def cached_dataset(name, year, month, day, generation, **options):
+    return read_dataset(name, year, month, day, **options)
+
+
+@profiled
+def temp_summary(year=None, month=None, day=None):
+    return cached_dataset("temp_summary", year, month, day, data_generation())
+
+
+@profiled
+def temp_vs_speed(year=None, month=None, day=None):
+    return cached_dataset("temp_vs_speed", year, month, day, data_generation())
+
+
+@profiled
+def time_vs_temp(year=None, month=None, day=None):
+    return cached_dataset("time_vs_temp", year, month, day, data_generation())
+
+
+@profiled
+def time_vs_power(year=None, month=None, day=None):
+    return cached_dataset("time_vs_power", year, month, day, data_generation())
+
+
+@profiled
+def temp_vs_power(year=None, month=None, day=None):
+    return cached_dataset("temp_vs_power", year, month, day, data_generation())
+
+
+@profiled
+def temp_ranges(year=None, month=None, day=None, edges=TEMP_RANGE_EDGES):
+    return cached_dataset("temp_ranges", year, month, day, data_generation(), edges=edges)
+
+
+# Séries do dashboard de uma vez ({nome: DataFrame}; `names`, por padrão todas): usado pelo app.py com
+# as séries de cada visão, lidas em uma conexão e com uma leitura por rollup
+@cached
+def cached_dashboard_data(year, month, day, edges, generation, names):
+    try:
+        return read_datasets(names, year, month, day, edges=edges)
+    except Exception as e:
+        print(f"Erro ao executar as consultas do dashboard: {e}")
+        return dict.fromkeys(names)
+
+
+@profiled
+def dashboard_data(year=None, month=None, day=None, edges=TEMP_RANGE_EDGES, names=None):
+    names = tuple(DASHBOARD_DATASETS if names is None else names)
+    return cached_dashboard_data(year, month, day, edges, data_generation(), names)